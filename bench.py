@@ -0,0 +1,239 @@
+"""
+Benchmarks of the simulator's hot paths, run one at a time on synthetic
+worlds: the model's update_temperature, update_grid, step and
+compute_equilibrium_temp, and the window's draw_grid_iso and temperature
+overlay (drawn offscreen through SDL's dummy video driver).
+
+build_terrain and repaint_tiles (timed at each of REPAINT_FRACTIONS of the
+map changed) are the two ways draw_grid_iso can bring its cached terrain up
+to date; where repaint_tiles overtakes build_terrain is the crossover that
+REPAINT_LIMIT should sit at.
+
+Every (case, grid size, INFLUENCE_LEVEL) combination reports calls per
+second, per-call latency percentiles and the peak Python/NumPy allocation
+of one call (tracemalloc). Results are written as JSON, and compare()
+lines a run up against a saved baseline.
+"""
+import json
+import os
+import platform
+import time
+import tracemalloc
+import numpy as np
+from constants import CELL_SIZE, DEFAULT_CONFIG
+from model import DaisyworldModel
+
+BENCH_VERSION = 1
+# (width, height) in cells
+GRID_SIZES = [(50, 40), (200, 80), (500, 200), (1000, 400)]
+INFLUENCE_LEVELS = [1, 2, 3, 5]
+# Cases whose cost depends on the influence level; the rest run once per grid
+# size at the configured level
+LEVEL_CASES = ["update_temperature", "update_grid", "step"]
+OTHER_CASES = ["compute_equilibrium_temp", "draw_grid_iso", "overlay", "build_terrain",
+               "repaint_tiles"]
+RENDER_CASES = ["draw_grid_iso", "overlay", "build_terrain", "repaint_tiles"]
+CASES = LEVEL_CASES + OTHER_CASES
+# Fractions of the map changed per repaint_tiles call
+REPAINT_FRACTIONS = [0.005, 0.01, 0.02, 0.05, 0.1, 0.2]
+# Steps run before timing so the grid has grown a daisy population
+WARMUP_STEPS = 20
+
+def measure(call, prepare=None, min_calls=5, min_time=1.0, max_calls=1000):
+    """
+    Times call() at least min_calls times and for at least min_time seconds
+    (at most max_calls). prepare(), if given, runs untimed before every call.
+    """
+    latencies = []
+    start = time.perf_counter()
+    while len(latencies) < max_calls and (len(latencies) < min_calls
+                                          or time.perf_counter() - start < min_time):
+        if prepare is not None:
+            prepare()
+        t0 = time.perf_counter()
+        call()
+        latencies.append(time.perf_counter() - t0)
+    # one more call under tracemalloc, which would distort the timings
+    if prepare is not None:
+        prepare()
+    tracemalloc.start()
+    call()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    ms = np.array(latencies) * 1000
+    return {
+        "calls": len(latencies),
+        "per_second": float(1000 / ms.mean()),
+        "mean_ms": float(ms.mean()),
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p90_ms": float(np.percentile(ms, 90)),
+        "p99_ms": float(np.percentile(ms, 99)),
+        "peak_mb": peak / 2**20,
+    }
+
+def bench_config(base, size, level):
+    """base with the map sized to `size` cells and the given influence level."""
+    config = dict(base)
+    config["map_width"] = size[0] * CELL_SIZE
+    config["map_height"] = size[1] * CELL_SIZE
+    config["INFLUENCE_LEVEL"] = level
+    config.setdefault("seed", 0)
+    return config
+
+def _warm_model(config):
+    """A reset model stepped WARMUP_STEPS frames, and its frame dt."""
+    model = DaisyworldModel(config)
+    model.reset()
+    dt = model.frame_dt()
+    for _ in range(WARMUP_STEPS):
+        model.step(dt)
+    return model, dt
+
+def _model_case(case, model, dt):
+    """(prepare, call) for one of the model cases."""
+    if case == "update_temperature":
+        return None, lambda: model.update_temperature(model.temp_grid, model.grid, dt,
+                                                      model.mid_temp)
+    if case == "update_grid":
+        def call():
+            # keep the grid moving so the ecology (and its active set) stays live
+            model.grid = model.update_grid(model.grid, model.temp_grid, dt)
+        return None, call
+    if case == "step":
+        return None, lambda: model.step(dt)
+    return None, model.compute_equilibrium_temp
+
+def _render_case(case, config, model, dt, fraction=None):
+    """
+    (prepare, call) for a render case; draw_grid_iso and overlay draw the
+    state one step on, repaint_tiles repaints `fraction` of the cells.
+    """
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import pygame
+    from simulator import DaisyworldSimulation
+    pygame.init()
+    sim = DaisyworldSimulation(config)
+    screen = pygame.display.set_mode((sim.WINDOW_WIDTH, sim.WINDOW_HEIGHT))
+    origin_x, origin_y = sim.WINDOW_WIDTH // 2, 50
+
+    if case == "build_terrain":
+        return None, lambda: sim.build_terrain(model.grid)
+    if case == "repaint_tiles":
+        sim.build_terrain(model.grid)
+        rng = np.random.default_rng(0)
+        count = max(1, int(fraction * model.grid.size))
+        cells = np.sort(rng.choice(model.grid.size, count, replace=False))
+        return None, lambda: sim.repaint_tiles(model.grid, cells)
+
+    if case == "draw_grid_iso":
+        def prepare():
+            # draw_grid_iso drains dirty_cells, so it only ever holds one step
+            model.step(dt)
+            sim.dirty_cells.append(model.changed)
+
+        # the first draw builds the terrain cache; time the per-frame repaints
+        sim.draw_grid_iso(screen, model.grid, origin_x, origin_y)
+        return prepare, lambda: sim.draw_grid_iso(screen, model.grid, origin_x, origin_y)
+
+    def prepare():
+        model.step(dt)
+
+    from overlay import TemperatureOverlay
+    overlay = TemperatureOverlay(sim.GRID_WIDTH, sim.GRID_HEIGHT, sim.cell_size,
+                                 sim.temp_thickness)
+    return prepare, lambda: overlay.draw(screen, model.temp_grid, origin_x, origin_y,
+                                         sim.OVERLAY_SHIFT_X, sim.OVERLAY_SHIFT_Y,
+                                         sim.gap_between_layers, sim.THRESHOLD)
+
+def run_benchmarks(base_config=None, sizes=None, levels=None, cases=None, min_time=1.0,
+                   report=print):
+    """
+    Runs every requested case over sizes x levels (level-independent cases once
+    per size) and returns the results document that write_results() saves.
+    """
+    base = dict(DEFAULT_CONFIG if base_config is None else base_config)
+    sizes = GRID_SIZES if sizes is None else sizes
+    levels = INFLUENCE_LEVELS if levels is None else levels
+    cases = CASES if cases is None else cases
+    default_level = int(base.get("INFLUENCE_LEVEL", 1))
+    runs = []
+    for size in sizes:
+        for level in levels:
+            runs += [(case, size, level, None) for case in cases if case in LEVEL_CASES]
+        for case in cases:
+            if case == "repaint_tiles":
+                runs += [(case, size, default_level, f) for f in REPAINT_FRACTIONS]
+            elif case not in LEVEL_CASES:
+                runs.append((case, size, default_level, None))
+
+    results = []
+    for case, size, level, fraction in runs:
+        config = bench_config(base, size, level)
+        model, dt = _warm_model(config)
+        if case in RENDER_CASES:
+            prepare, call = _render_case(case, config, model, dt, fraction)
+        else:
+            prepare, call = _model_case(case, model, dt)
+        row = {"case": case, "grid": list(size), "level": level}
+        if fraction is not None:
+            row["changed"] = fraction
+        row.update(measure(call, prepare, min_time=min_time))
+        results.append(row)
+        if report is not None:
+            report(f"{_label(case, fraction):26s} {size[0]:5d}x{size[1]:<4d} L{level}  "
+                   f"{row['per_second']:9.1f}/s  p50 {row['p50_ms']:8.2f} ms  "
+                   f"p99 {row['p99_ms']:8.2f} ms  peak {row['peak_mb']:7.1f} MB")
+    return {
+        "version": BENCH_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "machine": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "engine": base.get("engine", "numpy"),
+        "results": results,
+    }
+
+def _label(case, fraction=None):
+    """Case name as printed, with the changed fraction of a repaint_tiles row."""
+    return case if fraction is None else f"{case} {fraction:.1%}"
+
+def write_results(document, path):
+    with open(path, "w") as f:
+        json.dump(document, f, indent=1)
+
+def load_results(path):
+    with open(path) as f:
+        document = json.load(f)
+    if document.get("version") != BENCH_VERSION:
+        raise ValueError(f"{path}: unsupported benchmark version {document.get('version')}")
+    return document
+
+def compare(document, baseline, tolerance=0.10):
+    """
+    Pairs every result with the baseline's result for the same case, grid,
+    level and changed fraction. Returns rows (case, grid, level, changed,
+    baseline /s, current /s, ratio, verdict), where verdict is "slower" / "faster" when the ratio is outside
+    1 +- tolerance and "" otherwise.
+    """
+    def key(row):
+        return row["case"], tuple(row["grid"]), row["level"], row.get("changed")
+    before = {key(row): row for row in baseline["results"]}
+    rows = []
+    for row in document["results"]:
+        old = before.get(key(row))
+        if old is None:
+            continue
+        ratio = row["per_second"] / old["per_second"]
+        verdict = "slower" if ratio < 1 - tolerance else "faster" if ratio > 1 + tolerance else ""
+        rows.append(key(row) + (old["per_second"], row["per_second"], ratio, verdict))
+    return rows
+
+def print_comparison(rows):
+    for case, grid, level, changed, old, new, ratio, verdict in rows:
+        print(f"{_label(case, changed):26s} {grid[0]:5d}x{grid[1]:<4d} L{level}  {old:9.1f} -> {new:9.1f}/s  "
+              f"x{ratio:5.2f}  {verdict}")
+    slower = sum(1 for row in rows if row[-1] == "slower")
+    print(f"{len(rows)} cases compared, {slower} slower")
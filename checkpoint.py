@@ -0,0 +1,40 @@
+import io
+import json
+import os
+import numpy as np
+
+CHECKPOINT_VERSION = 1
+
+def save_checkpoint(path, state):
+    """
+    Writes a state dict (as built by DaisyworldModel.get_state or
+    DaisyworldSimulation.get_state) to a compact binary checkpoint.
+    Arrays are stored raw in an uncompressed .npz; everything else (scalars,
+    the RNG state, the config) goes into one JSON record. The file is written
+    next to `path` and renamed into place, so a crash mid-write never leaves
+    a truncated checkpoint behind.
+    """
+    arrays = {}
+    meta = {"version": CHECKPOINT_VERSION}
+    for key, value in state.items():
+        if isinstance(value, np.ndarray):
+            arrays[key] = value
+        else:
+            meta[key] = value
+    buf = io.BytesIO()
+    np.savez(buf, __meta__=np.frombuffer(json.dumps(meta).encode(), dtype=np.uint8), **arrays)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(buf.getbuffer())
+    os.replace(tmp_path, path)
+
+def load_checkpoint(path):
+    """Reads a checkpoint written by save_checkpoint back into a state dict."""
+    with np.load(path) as data:
+        state = json.loads(bytes(data["__meta__"]).decode())
+        if state.get("version") != CHECKPOINT_VERSION:
+            raise ValueError(f"{path}: unsupported checkpoint version {state.get('version')}")
+        for key in data.files:
+            if key != "__meta__":
+                state[key] = data[key]
+    return state
@@ -2,4 +2,38 @@ CELL_SIZE = 10
 EMPTY = 0
 WHITE_DAISY = 2
 BLACK_DAISY = 1
-WATER = 3
\ No newline at end of file
+WATER = 3
+
+# Default run configuration (the menu starts from this; headless runs overlay a JSON file on it)
+DEFAULT_CONFIG = {
+    "map_width": 1000,
+    "map_height": 400,
+    "temp_thickness": 3,
+    "T_space": 2.7,
+    "SUN_SCREENING": 1900,
+    "HEAT_DIFFUSION_COEFFICIENT": 0.2,
+    "HEATING_RATE": 0.2,
+    "INITIAL_TEMPERATURE": 500,
+    "ALBEDO_BLACK": 0.25,
+    "ALBEDO_WHITE": 0.75,
+    "ALBEDO_BARE": 0.5,
+    "ALBEDO_WATER": 0.9,
+    "HEAT_RETENTION": 0.1,
+    "T_OPTIMAL": 500,
+    "T_TOL_LOW": 50,
+    "T_TOL_HIGH": 70,
+    "SPREAD_CHANCE": 0.2,
+    "DEATH_CHANCE": 0.05,
+    "COOLING_COEFFICIENT": 9e-9,
+    "CUM_MOR_NET": 500,
+    "DAY_BORDER_SPEED": 30,
+    "DAY_PERIOD": 60.0,
+    "THRESHOLD": 1,
+    "THRESHOLD_TMID": 1,
+    "MAX_ITERS_TMID": 200,
+    "INFLUENCE_LEVEL": 2,
+    "overlay_shift_x": 200,
+    "overlay_shift_y": -10,
+    "overlay_shift_z": 50,
+    "equilibrium_cache": None
+}
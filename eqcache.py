@@ -0,0 +1,129 @@
+"""
+On-disk cache of T_equilibrium (DaisyworldModel.compute_equilibrium_temp).
+
+The equilibrium solve relaxes a bare planet's column profile, so its result
+depends only on the inputs collected by equilibrium_inputs(): grid width,
+ambient temperature, the heating/cooling physics, the day-night forcing and
+the solver's convergence settings. Those are hashed into a key, and results
+live in a small SQLite table at the path the run names. A lookup marks its
+entry used only when the mark is more than TOUCH_INTERVAL old, so hits are
+normally read-only; once the table holds more than max_entries, the least
+recently used entries (to within TOUCH_INTERVAL) are dropped.
+"""
+import hashlib
+import json
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# Bump when compute_equilibrium_temp changes what it returns for the same inputs
+EQCACHE_VERSION = 1
+# Seconds a hit may go without refreshing its entry's last_used mark
+TOUCH_INTERVAL = 3600
+
+def equilibrium_inputs(model, dt=0.1):
+    """Everything compute_equilibrium_temp(dt) reads, as a JSON-ready dict."""
+    return {
+        "version": EQCACHE_VERSION,
+        "width": model.GRID_WIDTH,
+        "ambient_temperature": model.ambient_temperature,
+        "HEATING_RATE": model.HEATING_RATE,
+        "sun_screening": model.sun_screening,
+        "ALBEDO_BARE": model.ALBEDO_BARE,
+        "COOLING_COEFFICIENT": model.COOLING_COEFFICIENT,
+        "T_space": model.T_space,
+        "DAY_BORDER_SPEED": model.DAY_BORDER_SPEED,
+        "THRESHOLD_TMID": model.THRESHOLD_TMID,
+        "MAX_ITERS_TMID": model.MAX_ITERS_TMID,
+        "INSOLATION_RESOLUTION": model.INSOLATION_RESOLUTION,
+        # latitude forcing scales the solve by the map's mean weight
+        "mean_weight": model._insolation.mean_weight(),
+        "dt": dt,
+    }
+
+def equilibrium_key(inputs):
+    """Content hash of an equilibrium_inputs() dict."""
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True).encode()).hexdigest()
+
+def _solve(config, dt):
+    from model import DaisyworldModel
+    return DaisyworldModel(config).compute_equilibrium_temp(dt)
+
+class EquilibriumCache:
+    """T_equilibrium results in the SQLite file at `path`, at most max_entries of them."""
+    def __init__(self, path, max_entries=10000):
+        self.path = path
+        self.max_entries = max_entries
+        # sweep workers may share one file; wait for each other's writes
+        self._db = sqlite3.connect(path, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS equilibrium ("
+                         "key TEXT PRIMARY KEY, mid_temp REAL, inputs TEXT, last_used REAL)")
+        self._db.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._db.close()
+
+    def __len__(self):
+        return self._db.execute("SELECT COUNT(*) FROM equilibrium").fetchone()[0]
+
+    def get(self, key):
+        """The cached T_equilibrium for key (marking it used if the mark is stale), or None."""
+        row = self._db.execute("SELECT mid_temp, last_used FROM equilibrium WHERE key = ?",
+                               (key,)).fetchone()
+        if row is None:
+            return None
+        now = time.time()
+        if now - row[1] > TOUCH_INTERVAL:
+            with self._db:
+                self._db.execute("UPDATE equilibrium SET last_used = ? WHERE key = ?", (now, key))
+        return row[0]
+
+    def put(self, key, mid_temp, inputs=None):
+        with self._db:
+            self._db.execute("INSERT OR REPLACE INTO equilibrium VALUES (?, ?, ?, ?)",
+                             (key, float(mid_temp), json.dumps(inputs), time.time()))
+            self._evict()
+
+    def _evict(self):
+        excess = len(self) - self.max_entries
+        if excess > 0:
+            self._db.execute("DELETE FROM equilibrium WHERE key IN (SELECT key FROM equilibrium "
+                             "ORDER BY last_used LIMIT ?)", (excess,))
+
+    def lookup(self, model, dt=0.1):
+        """model.compute_equilibrium_temp(dt), solved only if no cached result matches."""
+        inputs = equilibrium_inputs(model, dt)
+        key = equilibrium_key(inputs)
+        mid_temp = self.get(key)
+        if mid_temp is None:
+            mid_temp = model.compute_equilibrium_temp(dt)
+            self.put(key, mid_temp, inputs)
+        return mid_temp
+
+    def warm(self, configs, dt=0.1, max_workers=None):
+        """
+        Solves and stores T_equilibrium for every config not cached yet (solves
+        run in a process pool). Returns how many were solved.
+        """
+        from model import DaisyworldModel
+        missing = {}
+        for config in configs:
+            inputs = equilibrium_inputs(DaisyworldModel(config), dt)
+            key = equilibrium_key(inputs)
+            if key not in missing and self.get(key) is None:
+                missing[key] = (config, inputs)
+        if not missing:
+            return 0
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            futures = {key: pool.submit(_solve, config, dt)
+                       for key, (config, _) in missing.items()}
+            for key, future in futures.items():
+                self.put(key, future.result(), missing[key][1])
+        return len(missing)
@@ -0,0 +1,73 @@
+import numpy as np
+
+def insolation_profile(width, day_phase):
+    """
+    Solar intensity (0..1) of every column for dawn position(s) day_phase:
+    dark for the night half of the map, ramping up over the first quarter of
+    the day, flat at noon and ramping down over the last quarter. day_phase
+    may be a scalar (one row) or a column of phases (one row per phase).
+    """
+    x = np.arange(width)
+    day_start = np.asarray(day_phase, dtype=float)
+    day_end = (day_start + width/2) % width
+    is_day = np.where(day_start < day_end,
+                      (day_start <= x) & (x < day_end),
+                      (x >= day_start) | (x < day_end))
+
+    offset = np.where(x >= day_start, x - day_start, x + (width - day_start))
+    norm = offset/(width/2)
+    intensity = np.where(norm < 0.25, norm, np.where(norm > 0.75, 1 - norm, 1.0))
+    return np.where(is_day, intensity, 0.0)
+
+def cosine_latitude_weights(height):
+    """Per-row forcing weights cos(latitude), rows spanning pole to pole."""
+    latitude = ((np.arange(height) + 0.5) / height - 0.5) * np.pi
+    return np.cos(latitude)
+
+class Insolation:
+    """
+    Insolation forcing, optionally looked up instead of recomputed every step.
+
+    Intensity depends only on (column - dawn position) modulo the width, so
+    moving dawn by whole columns just rotates the profile. With resolution > 0
+    the profile is tabulated once for `resolution` dawn positions within one
+    column (resolution x width floats, stored twice over so every rotation is
+    a slice), and each step rounds day_phase to the nearest 1/resolution of a
+    column. That rounding changes the forcing (and so the run) unless every
+    step moves dawn by a multiple of 1/resolution column, so the table is
+    opt-in: resolution=0, the default, evaluates the profile exactly.
+
+    field() is the profile as a (1, width) row that broadcasts over the grid,
+    or, with per-row latitude_weights, the (height, width) outer product, so
+    latitude-dependent forcing costs one multiply rather than per-cell work.
+    """
+    def __init__(self, width, resolution=0, latitude_weights=None):
+        self.width = width
+        self.resolution = resolution
+        self.weights = None
+        if latitude_weights is not None:
+            self.weights = np.asarray(latitude_weights, dtype=float)[:, None]
+        self.table = None
+        if resolution:
+            dawn = np.arange(resolution)[:, None] / resolution
+            profiles = insolation_profile(width, dawn)
+            self.table = np.concatenate((profiles, profiles), axis=1)
+
+    def row(self, day_phase):
+        """Column profile (width,) for dawn position day_phase (a view; do not modify)."""
+        if self.table is None:
+            return insolation_profile(self.width, day_phase)
+        shift, sub = divmod(int(round(day_phase * self.resolution)), self.resolution)
+        shift %= self.width
+        return self.table[sub, self.width - shift:2 * self.width - shift]
+
+    def field(self, day_phase):
+        """Forcing that broadcasts over the (height, width) grid."""
+        row = self.row(day_phase)
+        if self.weights is None:
+            return row[None, :]
+        return self.weights * row
+
+    def mean_weight(self):
+        """Average latitude weight (1 without latitude forcing)."""
+        return 1.0 if self.weights is None else float(self.weights.mean())
@@ -1,13 +1,249 @@
-from menu import menu_screen_main
-from simulator import DaisyworldSimulation
+import argparse
+import json
+import time
+from constants import DEFAULT_CONFIG
 
-def simulation_loop(config):
+def simulation_loop(config, state=None):
+    from simulator import DaisyworldSimulation
     sim = DaisyworldSimulation(config)
+    if state is not None:
+        sim.set_state(state)
     sim.run()
+
+def load_config(path):
+    """Default configuration overlaid with the keys from a JSON file (if given)."""
+    config = dict(DEFAULT_CONFIG)
+    if path:
+        with open(path) as f:
+            config.update(json.load(f))
+    return config
+
+def positive_int(text):
+    """argparse type: an integer of at least 1."""
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return value
+
+def headless_loop(config, steps, dt=None, rng=None, snapshot_path=None, snapshot_every=1,
+                  state=None, workers=None):
+    """
+    Steps the model `steps` times without a display, frame cap or event pump,
+    then prints a short summary. dt defaults to one 60 FPS frame at the
+    configured time_flow, i.e. what the windowed run would use.
+    With snapshot_path, the full grid and temperature fields are streamed to
+    a memory-mapped snapshot file every snapshot_every steps, plus the first
+    and the final state.
+    A checkpoint `state` resumes a previous run instead of starting fresh; with
+    config["checkpoint_path"] set, checkpoints are written every
+    config["checkpoint_every"] steps and at the end.
+    workers > 1 splits the map into that many strips stepped in parallel
+    (parallel.ParallelModel), for worlds too large for one core.
+    """
+    from model import DaisyworldModel
+    from checkpoint import save_checkpoint
+    if snapshot_path and snapshot_every < 1:
+        raise ValueError("snapshot_every must be at least 1")
+    if workers and workers > 1:
+        from parallel import ParallelModel
+        model = ParallelModel(config, workers, rng=rng)
+    else:
+        model = DaisyworldModel(config, rng=rng)
+    if state is not None:
+        model.set_state(state)
+    else:
+        model.reset()
+    if dt is None:
+        dt = model.frame_dt()
+    checkpoint_path = config.get("checkpoint_path")
+    checkpoint_every = int(config.get("checkpoint_every", 1000))
+
+    snapshots = None
+    if snapshot_path:
+        from snapshots import SnapshotWriter
+        first, last = model.step_count, model.step_count + steps
+        # the first state, every multiple of snapshot_every after it and the final state
+        frames = (last // snapshot_every - first // snapshot_every + 1
+                  + (steps > 0 and last % snapshot_every != 0))
+        snapshots = SnapshotWriter(snapshot_path, model.GRID_HEIGHT, model.GRID_WIDTH,
+                                   frames, snapshot_every)
+        snapshots.write(model.step_count, model.grid, model.temp_grid)
+
+    start = time.perf_counter()
+    try:
+        for _ in range(steps):
+            model.step(dt)
+            if snapshots is not None:
+                snapshots.maybe_write(model.step_count, model.grid, model.temp_grid)
+            if checkpoint_path and model.step_count % checkpoint_every == 0:
+                save_checkpoint(checkpoint_path, model.get_state())
+        if snapshots is not None and steps > 0 and model.step_count % snapshot_every:
+            # the interval did not land on the last step
+            snapshots.write(model.step_count, model.grid, model.temp_grid)
+    finally:
+        if workers and workers > 1:
+            # stops the strip processes; the model keeps a copy of the final state
+            model.close()
+    elapsed = time.perf_counter() - start
+    if snapshots is not None:
+        snapshots.close()
+    if checkpoint_path:
+        save_checkpoint(checkpoint_path, model.get_state())
+
+    stats = model.summary()
+    print(f"steps: {steps}  dt: {dt:.5f}  elapsed: {elapsed:.2f}s  "
+          f"({steps / elapsed if elapsed > 0 else float('inf'):.1f} steps/s)")
+    print(f"T_equilibrium: {stats['T_mid']:.2f}  T_mean: {stats['T_mean']:.2f}  "
+          f"Tl: {stats['Tl']:.2f}  Th: {stats['Th']:.2f}")
+    print(f"white: {stats['white_fraction']:.3f}  black: {stats['black_fraction']:.3f}  "
+          f"bare: {stats['bare_fraction']:.3f}")
+    return model
+
+def sweep_main(config, spec_path, steps, dt, out_path, workers):
+    from sweep import load_sweep, run_sweep, write_results
+    overrides = load_sweep(spec_path)
+    start = time.perf_counter()
+    rows = run_sweep(overrides, config, steps, dt, max_workers=workers)
+    write_results(rows, out_path)
+    print(f"{len(rows)} runs x {steps} steps in {time.perf_counter() - start:.1f}s -> {out_path}")
+
+def ensemble_main(config, members, steps, dt, seed, record_every, out_path, workers):
+    from ensemble import run_ensemble, write_ensemble
+    start = time.perf_counter()
+    result = run_ensemble(config, members, steps, seed, dt, record_every, max_workers=workers)
+    write_ensemble(result, out_path)
+    print(f"{members} members x {steps} steps in {time.perf_counter() - start:.1f}s -> {out_path}")
+    print(f"master seed: {result['seed']}  (replay a member with --headless --seed SEED --member I)")
+
+def warm_main(config, spec_path, workers):
+    from sweep import load_sweep
+    from eqcache import EquilibriumCache
+    configs = []
+    for override in load_sweep(spec_path):
+        run = dict(config)
+        run.update(override)
+        configs.append(run)
+    with EquilibriumCache(config["equilibrium_cache"]) as cache:
+        solved = cache.warm(configs, max_workers=workers)
+        print(f"{len(configs)} configs, {solved} equilibria solved, "
+              f"{len(cache)} cached in {cache.path}")
+
+def bench_main(config, out_path, baseline_path):
+    from bench import run_benchmarks, write_results, load_results, compare, print_comparison
+    start = time.perf_counter()
+    document = run_benchmarks(config)
+    write_results(document, out_path)
+    print(f"{len(document['results'])} benchmarks in {time.perf_counter() - start:.1f}s -> {out_path}")
+    if baseline_path:
+        print_comparison(compare(document, load_results(baseline_path)))
+
 def main():
+    parser = argparse.ArgumentParser(description="2.5D Daisyworld")
+    parser.add_argument("--headless", action="store_true",
+                        help="run the model without a window (no menu, no frame cap)")
+    parser.add_argument("--steps", type=int, default=1000, help="number of headless steps")
+    parser.add_argument("--dt", type=float, default=None,
+                        help="headless step size (default: one 60 FPS frame at time_flow)")
+    parser.add_argument("--config", help="JSON file with configuration overrides")
+    parser.add_argument("--sweep", metavar="SPEC",
+                        help="JSON parameter sweep (list of overrides or {key: [values]} grid)")
+    parser.add_argument("--ensemble", type=positive_int, metavar="N",
+                        help="run N seeded members of --config and write mean/spread series")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="master seed (headless run, ensemble)")
+    parser.add_argument("--member", type=int, default=None,
+                        help="with --headless --seed: replay this ensemble member's stream")
+    parser.add_argument("--record-every", type=positive_int, default=10,
+                        help="ensemble sampling interval in steps")
+    parser.add_argument("--snapshot", metavar="PATH",
+                        help="headless: stream grid/temperature frames to a memory-mapped file")
+    parser.add_argument("--snapshot-every", type=positive_int, default=100,
+                        help="steps between snapshot frames")
+    parser.add_argument("--checkpoint", metavar="PATH",
+                        help="write binary checkpoints here (periodically and on Quit)")
+    parser.add_argument("--checkpoint-every", type=positive_int, default=None,
+                        help="steps between checkpoints (default 1000)")
+    parser.add_argument("--resume", metavar="PATH",
+                        help="continue a run from a checkpoint (its saved config is used)")
+    parser.add_argument("--cache", metavar="PATH",
+                        help="SQLite file caching T_equilibrium across runs (default: no cache)")
+    parser.add_argument("--warm-cache", metavar="SPEC",
+                        help="pre-solve T_equilibrium for every run of a sweep spec into --cache")
+    parser.add_argument("--bench", action="store_true",
+                        help="benchmark the hot paths over grid sizes and influence levels")
+    parser.add_argument("--baseline", metavar="PATH",
+                        help="with --bench: compare against a previous benchmark file")
+    parser.add_argument("--out", default=None,
+                        help="results file (sweep: sweep_results.csv, ensemble: ensemble.csv, "
+                             "bench: bench.json)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="sweep/ensemble worker processes (default: all cores); "
+                             "headless: step one map as this many parallel strips")
+    args = parser.parse_args()
+
+    state = None
+    if args.resume:
+        from checkpoint import load_checkpoint
+        state = load_checkpoint(args.resume)
+
+    def with_checkpoint_args(config):
+        if args.checkpoint:
+            config["checkpoint_path"] = args.checkpoint
+        if args.checkpoint_every:
+            config["checkpoint_every"] = args.checkpoint_every
+        return config
+
+    def with_cache_arg(config):
+        if args.cache:
+            config["equilibrium_cache"] = args.cache
+        return config
+
+    def base_config():
+        return with_cache_arg(load_config(args.config))
+
+    def run_config():
+        # a resumed run keeps the configuration it was started with
+        return with_checkpoint_args(with_cache_arg(state["config"]) if state is not None
+                                    else base_config())
+
+    if args.sweep:
+        sweep_main(base_config(), args.sweep, args.steps, args.dt,
+                   args.out or "sweep_results.csv", args.workers)
+        return
+    if args.ensemble:
+        ensemble_main(base_config(), args.ensemble, args.steps, args.dt, args.seed,
+                      args.record_every, args.out or "ensemble.csv", args.workers)
+        return
+    if args.warm_cache:
+        config = base_config()
+        if not config.get("equilibrium_cache"):
+            parser.error("--warm-cache needs a cache file: pass --cache PATH "
+                         "(or set equilibrium_cache in --config)")
+        warm_main(config, args.warm_cache, args.workers)
+        return
+    if args.bench:
+        bench_main(load_config(args.config), args.out or "bench.json", args.baseline)
+        return
+    if args.headless:
+        config = run_config()
+        rng = None
+        if args.seed is not None:
+            if args.member is not None:
+                from ensemble import member_rng
+                rng = member_rng(args.seed, args.member)
+            else:
+                config["seed"] = args.seed
+        headless_loop(config, args.steps, args.dt, rng, args.snapshot, args.snapshot_every,
+                      state, args.workers)
+        return
+
+    if state is not None:
+        simulation_loop(run_config(), state)
+        return
+    from menu import menu_screen_main
     # Get configuration from the menu (map dimensions, etc.)
     config = menu_screen_main()
-    simulation_loop(config)
+    simulation_loop(with_checkpoint_args(with_cache_arg(config)))
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -1,9 +1,10 @@
 import pygame
 import os
-from constants import CELL_SIZE, EMPTY, WHITE_DAISY, BLACK_DAISY, WATER
+import numpy as np
+from constants import CELL_SIZE, EMPTY, WHITE_DAISY, BLACK_DAISY, WATER, DEFAULT_CONFIG
 # ----- Constants and Colors -----
-DEFAULT_MAP_WIDTH = 1000
-DEFAULT_MAP_HEIGHT = 400
+DEFAULT_MAP_WIDTH = DEFAULT_CONFIG["map_width"]
+DEFAULT_MAP_HEIGHT = DEFAULT_CONFIG["map_height"]
 
 # Colors for text and backgrounds
 COLOR_TEXT = (0, 0, 0)
@@ -23,6 +24,14 @@ COLOR_SCROLLBAR_THUMB = (100, 100, 100)
 
 FPS = 30
 
+# Scenario editor: cell colours indexed by cell code, and the grid line around each cell
+EDITOR_COLORS = np.zeros((4, 3), dtype=np.uint8)
+EDITOR_COLORS[EMPTY] = (139, 69, 19)
+EDITOR_COLORS[WHITE_DAISY] = (255, 255, 255)
+EDITOR_COLORS[BLACK_DAISY] = (0, 0, 0)
+EDITOR_COLORS[WATER] = (0, 0, 255)
+EDITOR_GRID_LINE = (80, 80, 80)
+
 # ----- Main Menu Screen -----
 def main_menu(screen, font, window_size, config):
     """
@@ -281,6 +290,28 @@ def settings_menu(screen, font, window_size, config):
         clock.tick(FPS)
 
 # ----- Scenario Editor -----
+_disk_masks = {}
+
+def disk_mask(radius):
+    """Boolean (2r+1, 2r+1) mask of the cells within `radius` of the centre cell (cached)."""
+    if radius not in _disk_masks:
+        d = np.arange(-radius, radius + 1)
+        _disk_masks[radius] = d[:, None] ** 2 + d[None, :] ** 2 <= radius ** 2
+    return _disk_masks[radius]
+
+def paint_canvas(canvas, grid, y0, y1, x0, x1):
+    """Renders grid rows y0:y1, columns x0:x1 (fill plus 1-pixel grid line) into the canvas."""
+    colors = EDITOR_COLORS[grid[y0:y1, x0:x1]]
+    block = np.repeat(np.repeat(colors, CELL_SIZE, axis=0), CELL_SIZE, axis=1)
+    line = np.zeros((CELL_SIZE, CELL_SIZE), dtype=bool)
+    line[[0, -1], :] = True
+    line[:, [0, -1]] = True
+    block[np.tile(line, (y1 - y0, x1 - x0))] = EDITOR_GRID_LINE
+    pixels = pygame.surfarray.pixels3d(canvas)
+    # surfarray indexes pixels as (x, y)
+    pixels[x0 * CELL_SIZE:x1 * CELL_SIZE, y0 * CELL_SIZE:y1 * CELL_SIZE] = block.transpose(1, 0, 2)
+    del pixels
+
 def scenario_editor(screen, config):
     """
     Launches a 2D map editor using the config's map size.
@@ -296,7 +327,7 @@ def scenario_editor(screen, config):
 
     map_width = config.get("map_width", DEFAULT_MAP_WIDTH)
     map_height = config.get("map_height", DEFAULT_MAP_HEIGHT)
-    pygame.display.set_mode((map_width, map_height))
+    screen = pygame.display.set_mode((map_width, map_height))
     pygame.display.set_caption("Scenario Editor")
     clock = pygame.time.Clock()
     font = pygame.font.SysFont(None, 24)
@@ -304,8 +335,14 @@ def scenario_editor(screen, config):
     GRID_WIDTH = map_width // CELL_SIZE
     GRID_HEIGHT = map_height // CELL_SIZE
 
-    grid = [[EMPTY for _ in range(GRID_WIDTH)] for _ in range(GRID_HEIGHT)]
+    grid = np.full((GRID_HEIGHT, GRID_WIDTH), EMPTY, dtype=np.uint8)
     painted = False
+    # The map is rendered once into `canvas`; painting re-renders just the
+    # brushed cells, and the screen is redrawn only when something changed
+    canvas = pygame.Surface((GRID_WIDTH * CELL_SIZE, GRID_HEIGHT * CELL_SIZE)).convert()
+    paint_canvas(canvas, grid, 0, GRID_HEIGHT, 0, GRID_WIDTH)
+    redraw = True
+    dirty_rects = []
 
     pan_x, pan_y = 0, 0
     dragging_pan = False
@@ -346,6 +383,7 @@ def scenario_editor(screen, config):
                 if event.button == 1:
                     mx, my = event.pos
                     if panel_rect.collidepoint(mx, my):
+                        redraw = True
                         for i, center in enumerate(brush_button_centers):
                             cx, cy = center
                             if (mx - cx) ** 2 + (my - cy) ** 2 <= brush_button_radius ** 2:
@@ -362,10 +400,14 @@ def scenario_editor(screen, config):
                         grid_y = (my - pan_y) // CELL_SIZE
                         if 0 <= grid_x < GRID_WIDTH and 0 <= grid_y < GRID_HEIGHT:
                             painted = True
-                            for i in range(max(0, grid_y - brush_radius), min(GRID_HEIGHT, grid_y + brush_radius + 1)):
-                                for j in range(max(0, grid_x - brush_radius), min(GRID_WIDTH, grid_x + brush_radius + 1)):
-                                    if ((i - grid_y) ** 2 + (j - grid_x) ** 2) ** 0.5 <= brush_radius:
-                                        grid[i][j] = brush_types[current_brush]
+                            y0, y1 = max(0, grid_y - brush_radius), min(GRID_HEIGHT, grid_y + brush_radius + 1)
+                            x0, x1 = max(0, grid_x - brush_radius), min(GRID_WIDTH, grid_x + brush_radius + 1)
+                            mask = disk_mask(brush_radius)[y0 - grid_y + brush_radius:y1 - grid_y + brush_radius,
+                                                           x0 - grid_x + brush_radius:x1 - grid_x + brush_radius]
+                            grid[y0:y1, x0:x1][mask] = brush_types[current_brush]
+                            paint_canvas(canvas, grid, y0, y1, x0, x1)
+                            dirty_rects.append(pygame.Rect(pan_x + x0 * CELL_SIZE, pan_y + y0 * CELL_SIZE,
+                                                           (x1 - x0) * CELL_SIZE, (y1 - y0) * CELL_SIZE))
                 elif event.button == 3:
                     dragging_pan = True
                     last_pan_pos = event.pos
@@ -382,27 +424,28 @@ def scenario_editor(screen, config):
                     pan_x += dx
                     pan_y += dy
                     last_pan_pos = event.pos
+                    redraw = True
                 if dragging_slider:
                     rel_x = event.pos[0] - slider_rect.x
                     t = max(0, min(rel_x / (slider_rect.width - thumb_width), 1))
                     brush_radius = int(round(t * 9)) + 1
+                    redraw = True
             elif event.type == pygame.MOUSEWHEEL:
                 brush_radius = max(1, min(brush_radius + event.y, 10))
-        screen.fill((50, 50, 50))
-        for i in range(GRID_HEIGHT):
-            for j in range(GRID_WIDTH):
-                cell = grid[i][j]
-                if cell == EMPTY:
-                    color = (139, 69, 19)
-                elif cell == WHITE_DAISY:
-                    color = (255, 255, 255)
-                elif cell == BLACK_DAISY:
-                    color = (0, 0, 0)
-                elif cell == WATER:
-                    color = (0, 0, 255)
-                rect = pygame.Rect(pan_x + j * CELL_SIZE, pan_y + i * CELL_SIZE, CELL_SIZE, CELL_SIZE)
-                pygame.draw.rect(screen, color, rect)
-                pygame.draw.rect(screen, (80, 80, 80), rect, 1)
+                redraw = True
+        if not running:
+            break
+        if redraw:
+            screen.fill((50, 50, 50))
+            screen.blit(canvas, (pan_x, pan_y))
+        elif dirty_rects:
+            # copy just the repainted cells from the canvas; the panel may sit on top of them
+            for rect in dirty_rects:
+                screen.blit(canvas, rect.topleft, rect.move(-pan_x, -pan_y))
+            dirty_rects.append(panel_rect)
+        else:
+            clock.tick(60)
+            continue
         pygame.draw.rect(screen, (200, 200, 200), panel_rect)
         pygame.draw.rect(screen, COLOR_BUTTON_BORDER, panel_rect, 2)
         pygame.draw.rect(screen, COLOR_BUTTON, save_button_rect)
@@ -426,7 +469,12 @@ def scenario_editor(screen, config):
                 pygame.draw.circle(screen, (150, 150, 150), center, brush_button_radius)
             label = font.render(brush_labels[i], True, COLOR_TEXT)
             screen.blit(label, label.get_rect(center=(cx, cy + brush_button_radius + 15)))
-        pygame.display.flip()
+        if redraw:
+            pygame.display.flip()
+        else:
+            pygame.display.update(dirty_rects)
+        redraw = False
+        dirty_rects = []
         clock.tick(60)
     return grid
 
@@ -445,37 +493,7 @@ def menu_screen_main():
     font = pygame.font.SysFont(None, 32)
     
     # Initialize config with default values, including simulation parameters.
-    config = {
-        "map_width": DEFAULT_MAP_WIDTH,
-        "map_height": DEFAULT_MAP_HEIGHT,
-        "temp_thickness": 3,
-        "T_space": 2.7,
-        "SUN_SCREENING": 1900,
-        "HEAT_DIFFUSION_COEFFICIENT": 0.2,
-        "HEATING_RATE": 0.2,
-        "INITIAL_TEMPERATURE": 500,
-        "ALBEDO_BLACK": 0.25,
-        "ALBEDO_WHITE": 0.75,
-        "ALBEDO_BARE": 0.5,
-        "ALBEDO_WATER": 0.9,
-        "HEAT_RETENTION": 0.1,
-        "T_OPTIMAL": 500,
-        "T_TOL_LOW": 50,
-        "T_TOL_HIGH": 70,
-        "SPREAD_CHANCE": 0.2,
-        "DEATH_CHANCE": 0.05,
-        "COOLING_COEFFICIENT": 9e-9,
-        "CUM_MOR_NET": 500,
-        "DAY_BORDER_SPEED": 30,
-        "DAY_PERIOD": 60.0,
-        "THRESHOLD": 1,
-        "THRESHOLD_TMID": 1,
-        "MAX_ITERS_TMID": 200,
-        "INFLUENCE_LEVEL": 2,
-        "overlay_shift_x": 200,
-        "overlay_shift_y": -10,
-        "overlay_shift_z": 50
-    }
+    config = dict(DEFAULT_CONFIG)
     
     state = "main"  # or "settings"
     while True:
@@ -0,0 +1,511 @@
+import time
+import warnings
+import numpy as np
+from constants import CELL_SIZE, EMPTY, WHITE_DAISY, BLACK_DAISY, WATER
+from stats import extreme_means
+from neighborhood import Neighborhood
+from insolation import Insolation, cosine_latitude_weights
+
+# Active-set updates gather len(kernel) values per touched cell; beyond this many
+# gathered values per grid cell, one dense neighbourhood sum is cheaper
+ACTIVE_SET_GATHER_LIMIT = 4
+
+class DaisyworldModel:
+    """
+    Display-free Daisyworld model. Owns the cell grid, the temperature field,
+    the day-night phase and the equilibrium temperature, and advances them
+    with step(dt). Nothing here touches pygame, so it runs on machines
+    without a display.
+
+    All randomness comes from self.rng: pass a numpy Generator as `rng`, or set
+    config["seed"] to make a run reproducible.
+
+    config["engine"] = "numba" runs the temperature step, the neighbour sums
+    of the ecology step and the equilibrium solve as compiled kernels
+    (numba_kernels.py); without Numba installed it warns and stays on NumPy.
+    """
+    def __init__(self, config, rng=None):
+        self.config = config
+        self.cell_size = CELL_SIZE  # Base cell size in pixels
+        self.time_flow = int(config.get("time_flow", 100))
+        # Simulation parameters from config with defaults
+        self.T_space = float(config.get("T_space", 2.7))
+        self.SUN_SCREENING = float(config.get("SUN_SCREENING", 1900))
+        self.HEAT_DIFFUSION_COEFFICIENT = float(config.get("HEAT_DIFFUSION_COEFFICIENT", 0.2))
+        self.HEATING_RATE = float(config.get("HEATING_RATE", 0.2))
+        self.INITIAL_TEMPERATURE = float(config.get("INITIAL_TEMPERATURE", 500))
+        self.ALBEDO_BLACK = float(config.get("ALBEDO_BLACK", 0.25))
+        self.ALBEDO_WHITE = float(config.get("ALBEDO_WHITE", 0.75))
+        self.ALBEDO_BARE = float(config.get("ALBEDO_BARE", 0.5))
+        self.ALBEDO_WATER = float(config.get("ALBEDO_WATER", 0.9))
+        self.HEAT_RETENTION = float(config.get("HEAT_RETENTION", 0.1))
+        self.T_OPTIMAL = float(config.get("T_OPTIMAL", 500))
+        # single “average” tolerance for backward compatibility
+        self.T_TOLERANCE = float(config.get("T_TOLERANCE", 50))
+        # separate low/high tolerances
+        self.T_TOL_LOW  = float(config.get("T_TOL_LOW", self.T_TOLERANCE))
+        self.T_TOL_HIGH = float(config.get("T_TOL_HIGH", self.T_TOLERANCE))
+        self.SPREAD_CHANCE = float(config.get("SPREAD_CHANCE", 0.2))
+        self.DEATH_CHANCE = float(config.get("DEATH_CHANCE", 0.05))
+        self.COOLING_COEFFICIENT = float(config.get("COOLING_COEFFICIENT", 9e-9))
+        self.DAY_BORDER_SPEED = float(config.get("DAY_BORDER_SPEED", 30))
+        self.DAY_PERIOD = float(config.get("DAY_PERIOD", 60.0))
+        # Insolation table resolution (tabulated dawn positions per column; 0 = exact,
+        # anything else rounds the dawn position and so changes the forcing)
+        self.INSOLATION_RESOLUTION = int(config.get("INSOLATION_RESOLUTION", 0))
+        self.LATITUDE_FORCING = bool(config.get("LATITUDE_FORCING", False))
+        # Reference step: SPREAD_CHANCE and DEATH_CHANCE are per SIM_DT of simulated time
+        self.SIM_DT = float(config.get("SIM_DT", 1.0 / 60.0))
+        self.THRESHOLD_TMID = float(config.get("THRESHOLD_TMID", 1))
+        self.MAX_ITERS_TMID = int(config.get("MAX_ITERS_TMID", 200))
+        self.INFLUENCE_LEVEL = int(config.get("INFLUENCE_LEVEL", 1))
+        # Tl/Th average the EXTREME_K coldest/hottest cells
+        self.EXTREME_K = int(config.get("EXTREME_K", 100))
+        # Compute backend: "numpy" (reference) or "numba"
+        self.engine = config.get("engine", "numpy")
+        self._kernels = None
+        if self.engine == "numba":
+            try:
+                import numba_kernels
+                self._kernels = numba_kernels
+            except ImportError:
+                warnings.warn('engine "numba" needs the numba package; using the NumPy engine')
+                self.engine = "numpy"
+        elif self.engine != "numpy":
+            raise ValueError(f"unknown engine {self.engine!r} (expected 'numpy' or 'numba')")
+        # Temperature integrator: "explicit" (forward Euler, reference) or "imex"
+        # (implicit diffusion and linearised cooling, stable at large dt)
+        self.INTEGRATOR = config.get("INTEGRATOR", "explicit")
+        if self.INTEGRATOR not in ("explicit", "imex"):
+            raise ValueError(f"unknown integrator {self.INTEGRATOR!r} (expected 'explicit' or 'imex')")
+        # IMEX fixed-point solve: stop once no cell moves more than IMEX_TOL (K)
+        self.IMEX_TOL = float(config.get("IMEX_TOL", 1e-3))
+        self.IMEX_MAX_ITERS = int(config.get("IMEX_MAX_ITERS", 30))
+        # SQLite file caching T_equilibrium across runs (eqcache.py); None solves every reset
+        self.EQUILIBRIUM_CACHE = config.get("equilibrium_cache")
+        # Evaluate colonisation only on the tracked frontier of EMPTY cells next to daisies
+        self.ACTIVE_SET = bool(config.get("ACTIVE_SET", True))
+        # Daisy types
+        self.EMPTY = EMPTY
+        self.BLACK_DAISY = BLACK_DAISY
+        self.WHITE_DAISY = WHITE_DAISY
+        self.WATER = WATER
+        # Live parameters (God's Brush changes these while running)
+        self.sun_screening = float(config.get("sun_screening", self.SUN_SCREENING))
+        self.peak_growth   = float(config.get("peak_growth", 100.0))
+
+        # Map dimensions (also from config)
+        self.map_width = int(config.get("map_width", 500))
+        self.map_height = int(config.get("map_height", 500))
+        self.ambient_temperature = float(config.get("ambient_temperature", self.INITIAL_TEMPERATURE))
+        self.GRID_WIDTH = self.map_width // self.cell_size
+        self.GRID_HEIGHT = self.map_height // self.cell_size
+
+        # --- Array engine lookups ---
+        # albedo per cell code (WATER is pinned to mid_temp, so its entry is unused)
+        self._albedo_lut = np.zeros(4)
+        self._albedo_lut[self.EMPTY] = self.ALBEDO_BARE
+        self._albedo_lut[self.BLACK_DAISY] = self.ALBEDO_BLACK
+        self._albedo_lut[self.WHITE_DAISY] = self.ALBEDO_WHITE
+        self._albedo_lut[self.WATER] = self.ALBEDO_BARE
+        # day-night forcing, tabulated by dawn position
+        self._insolation = Insolation(
+            self.GRID_WIDTH, self.INSOLATION_RESOLUTION,
+            cosine_latitude_weights(self.GRID_HEIGHT) if self.LATITUDE_FORCING else None)
+        # heat-averaging neighbourhood and how many of its cells exist on each row
+        self._heat = Neighborhood(self.INFLUENCE_LEVEL, self.GRID_HEIGHT, self.GRID_WIDTH,
+                                  include_center=True)
+        self._heat_counts = self._heat.row_counts()
+        # colonisation neighbourhood (a cell never seeds itself)
+        self._spread = Neighborhood(self.INFLUENCE_LEVEL, self.GRID_HEIGHT, self.GRID_WIDTH,
+                                    include_center=False)
+        self.rng = rng if rng is not None else np.random.default_rng(config.get("seed"))
+
+        # --- Simulation state (filled by reset()) ---
+        self.grid = None
+        self.temp_grid = None
+        self.day_phase_offset = 0.0
+        self.mid_temp = None
+        self.step_count = 0
+        # population per cell code (EMPTY/BLACK/WHITE/WATER), kept up to date by step()
+        self.cell_counts = np.zeros(4, dtype=np.int64)
+        # flat indices of the cells the last update_grid call changed
+        self.changed = np.zeros(0, dtype=np.intp)
+        # Active-set bookkeeping (ACTIVE_SET), all flat over the grid: daisy and
+        # black-daisy neighbour counts, and masks of the daisies and of the frontier
+        self._n_daisy = None
+        self._n_black = None
+        self._daisy_mask = None
+        self._frontier_mask = None
+        # profiler.Profiler timing the step phases, or None (the default: no timing)
+        self.profiler = None
+
+    def reset(self):
+        """Seeds a fresh grid, solves T_equilibrium and starts every land cell at ambient."""
+        self.grid = np.asarray(self.init_grid())
+        self.mid_temp = self.equilibrium_temp()
+        self.temp_grid = np.where(self.grid == self.WATER,
+                                  self.mid_temp, self.ambient_temperature)
+        self.day_phase_offset = 0.0
+        self.step_count = 0
+        self.recount()
+
+    def recount(self):
+        """Full O(cells) recount of cell_counts (and the active set); step() only adjusts them."""
+        self.cell_counts = np.bincount(self.grid.ravel(), minlength=4).astype(np.int64)
+        if self.ACTIVE_SET:
+            self._rebuild_active_set(self.grid)
+
+    def _rebuild_active_set(self, grid):
+        black = grid == self.BLACK_DAISY
+        daisy = black | (grid == self.WHITE_DAISY)
+        self._n_black = self._spread.sum(black).astype(np.int32).ravel()
+        self._n_daisy = self._spread.sum(daisy).astype(np.int32).ravel()
+        self._daisy_mask = daisy.ravel()
+        self._frontier_mask = (grid.ravel() == self.EMPTY) & (self._n_daisy > 0)
+
+    def _update_active_set(self, old, new, dead, born):
+        """
+        Applies one step's deaths and births to the active set, touching only
+        the changed cells' neighbourhoods: O(changes x kernel size), plus mask
+        scans that are trivial next to a neighbourhood sum. A step that changes
+        so much that a full rebuild is cheaper does that instead.
+        """
+        changed = np.concatenate((dead, born))
+        if changed.size * len(self._spread.offsets) > ACTIVE_SET_GATHER_LIMIT * new.size:
+            self._rebuild_active_set(new)
+            return
+        d_daisy = np.concatenate((np.full(dead.size, -1, np.int32), np.ones(born.size, np.int32)))
+        d_black = np.concatenate((-(old.flat[dead] == self.BLACK_DAISY).astype(np.int32),
+                                  (new.flat[born] == self.BLACK_DAISY).astype(np.int32)))
+        nbrs, valid = self._spread.neighbors(changed)
+        targets = nbrs[valid]
+        np.add.at(self._n_daisy, targets, np.broadcast_to(d_daisy[:, None], nbrs.shape)[valid])
+        np.add.at(self._n_black, targets, np.broadcast_to(d_black[:, None], nbrs.shape)[valid])
+
+        self._daisy_mask[dead] = False
+        self._daisy_mask[born] = True
+        # only the changed cells and their neighbours can enter or leave the frontier
+        touched = np.concatenate((targets, changed))
+        self._frontier_mask[touched] = (new.flat[touched] == self.EMPTY) & (self._n_daisy[touched] > 0)
+
+    def _frontier_temp_sum(self, cells, temp, cand):
+        """Sum of daisy-neighbour temperatures for each candidate, gathered per candidate."""
+        if self._kernels is not None:
+            return self._kernels.candidate_temp_sums(
+                cells, temp, cand, self._spread.dys, self._spread.dxs,
+                self.BLACK_DAISY, self.WHITE_DAISY)
+        if cand.size * len(self._spread.offsets) > ACTIVE_SET_GATHER_LIMIT * cells.size:
+            daisy = (cells == self.BLACK_DAISY) | (cells == self.WHITE_DAISY)
+            return self._spread.sum(np.where(daisy, temp, 0.0)).flat[cand]
+        nbrs, valid = self._spread.neighbors(cand)
+        # off-map rows are masked out; clip just keeps their indices in range
+        kind = cells.take(nbrs, mode='clip')
+        daisy = valid & ((kind == self.BLACK_DAISY) | (kind == self.WHITE_DAISY))
+        return np.where(daisy, temp.take(nbrs, mode='clip'), 0.0).sum(axis=1)
+
+    def step(self, dt):
+        """Advances the day-night border, the temperature field and the ecology by dt."""
+        profiler = self.profiler
+        if profiler is not None:
+            start = time.perf_counter()
+        self.day_phase_offset = (self.day_phase_offset - self.DAY_BORDER_SPEED * dt) % self.GRID_WIDTH
+        self.temp_grid = self.update_temperature(self.temp_grid, self.grid, dt, self.mid_temp)
+        if profiler is not None:
+            start = profiler.record_sim("temperature", start)
+        old_grid = self.grid
+        self.grid = self.update_grid(old_grid, self.temp_grid, dt)
+        # O(changes) population bookkeeping
+        changed = self.changed
+        self.cell_counts -= np.bincount(old_grid.flat[changed], minlength=4)
+        self.cell_counts += np.bincount(self.grid.flat[changed], minlength=4)
+        self.step_count += 1
+        if profiler is not None:
+            profiler.record_sim("ecology", start, steps=1)
+
+    def get_state(self):
+        """
+        Everything needed to continue this run exactly: fields, clock, live
+        parameters, the RNG state and the config (minus the scenario map,
+        which the saved grid already contains).
+        """
+        config = {k: v for k, v in self.config.items() if k != "scenario_map"}
+        return {
+            "config": config,
+            "grid": self.grid,
+            "temp_grid": self.temp_grid,
+            "day_phase_offset": float(self.day_phase_offset),
+            "mid_temp": float(self.mid_temp),
+            "step_count": int(self.step_count),
+            "time_flow": int(self.time_flow),
+            "sun_screening": float(self.sun_screening),
+            "peak_growth": float(self.peak_growth),
+            "rng_state": self.rng.bit_generator.state,
+        }
+
+    def set_state(self, state):
+        """Restores a state produced by get_state (e.g. from a checkpoint)."""
+        self.grid = np.array(state["grid"], dtype=np.uint8)
+        self.temp_grid = np.array(state["temp_grid"], dtype=float)
+        self.day_phase_offset = float(state["day_phase_offset"])
+        self.mid_temp = float(state["mid_temp"])
+        self.step_count = int(state["step_count"])
+        self.time_flow = int(state["time_flow"])
+        self.sun_screening = float(state["sun_screening"])
+        self.peak_growth = float(state["peak_growth"])
+        self.rng.bit_generator.state = state["rng_state"]
+        self.recount()
+
+    def frame_dt(self, fps=60):
+        """Simulated time covered by one windowed frame at the current time_flow."""
+        return (1.0 / fps) * (self.time_flow / 100.0)
+
+    def temperature_extremes(self, k=None):
+        """(Tl, Th): mean of the k (default EXTREME_K) coldest and hottest cells."""
+        return extreme_means(self.temp_grid, self.EXTREME_K if k is None else k)
+
+    def summary(self, k=None):
+        """
+        Headline diagnostics of the current state, as shown on the stats panel:
+        T_mean, land-cover fractions (water excluded) and Tl/Th, the means of
+        the k (default EXTREME_K) coldest and hottest cells.
+        """
+        bare = int(self.cell_counts[self.EMPTY])
+        white = int(self.cell_counts[self.WHITE_DAISY])
+        black = int(self.cell_counts[self.BLACK_DAISY])
+        land = max(bare + white + black, 1)
+        Tl, Th = self.temperature_extremes(k)
+        return {
+            "T_mid": float(self.mid_temp),
+            "T_mean": float(np.mean(self.temp_grid)),
+            "white_fraction": white / land,
+            "black_fraction": black / land,
+            "bare_fraction": bare / land,
+            "Tl": Tl,
+            "Th": Th,
+        }
+
+    def init_grid(self):
+        if self.config.get("scenario_map") is not None:
+            return np.array(self.config["scenario_map"], dtype=np.uint8)
+
+        grid = np.full((self.GRID_HEIGHT, self.GRID_WIDTH), self.EMPTY, dtype=np.uint8)
+        half = 50
+        # scatter the black seeds, then the white ones (a white seed may land on a black one)
+        for daisy in (self.BLACK_DAISY, self.WHITE_DAISY):
+            x = self.rng.integers(0, self.GRID_WIDTH, half)
+            y = self.rng.integers(0, self.GRID_HEIGHT, half)
+            grid[y, x] = daisy
+        return grid
+
+    def update_grid(self, grid, temp_grid, dt):
+        cells = np.asarray(grid)
+        temp = np.asarray(temp_grid, dtype=float)
+        new = cells.copy()
+        # the tracked active set describes self.grid only
+        active = self.ACTIVE_SET and grid is self.grid
+        if active:
+            daisy_idx = np.flatnonzero(self._daisy_mask)
+        else:
+            black = cells == self.BLACK_DAISY
+            daisy = black | (cells == self.WHITE_DAISY)
+            daisy_idx = np.flatnonzero(daisy)
+
+        # --- Mortality: one draw per daisy ---
+        # event probabilities scale with the simulated time this step covers
+        steps = dt / self.SIM_DT
+        dies = self.rng.random(daisy_idx.size) < self.DEATH_CHANCE * steps
+        dead = daisy_idx[dies]
+        new.flat[dead] = self.EMPTY
+
+        # --- Colonisation of EMPTY cells next to at least one daisy ---
+        if active:
+            cand = np.flatnonzero(self._frontier_mask)
+            n_cand = self._n_daisy[cand]
+            n_black_cand = self._n_black[cand]
+            temp_sum = self._frontier_temp_sum(cells, temp, cand)
+        elif self._kernels is not None:
+            # one fused pass over the EMPTY cells (all zero elsewhere)
+            n_daisy, n_black, temp_sums = self._kernels.spread_sums(
+                cells, temp, self._spread.runs, self.EMPTY, self.BLACK_DAISY, self.WHITE_DAISY)
+            cand = np.flatnonzero(n_daisy > 0)
+            n_cand = n_daisy.flat[cand]
+            n_black_cand = n_black.flat[cand]
+            temp_sum = temp_sums.flat[cand]
+        else:
+            n_black = self._spread.sum(black)
+            n_daisy = self._spread.sum(daisy)
+            cand = np.flatnonzero((cells == self.EMPTY) & (n_daisy > 0))
+            n_cand = n_daisy.flat[cand]
+            n_black_cand = n_black.flat[cand]
+            temp_sum = self._spread.sum(np.where(daisy, temp, 0.0)).flat[cand]
+        local_temp = temp_sum / n_cand
+        # choose low‐ or high‐side tolerance
+        tol = np.where(local_temp < self.T_OPTIMAL, self.T_TOL_LOW, self.T_TOL_HIGH)
+        rate = np.maximum(0, 1 - ((local_temp - self.T_OPTIMAL) / tol)**2)
+        spread = self.rng.random(cand.size) < (
+            self.SPREAD_CHANCE * (self.peak_growth/100.0) * rate * steps)
+
+        # new daisy copies a random daisy neighbour: black with probability n_black / n
+        born = cand[spread]
+        pick_black = self.rng.random(born.size) * n_cand[spread] < n_black_cand[spread]
+        new.flat[born] = np.where(pick_black, self.BLACK_DAISY, self.WHITE_DAISY)
+
+        # deaths hit daisies and births EMPTY cells, so the two sets never overlap
+        self.changed = np.concatenate((dead, born))
+        if active:
+            self._update_active_set(cells, new, dead, born)
+        return new
+
+    def update_temperature(self, temp_grid, grid, dt, mid_temp):
+        temp = np.asarray(temp_grid, dtype=float)
+        cells = np.asarray(grid)
+        if self.INTEGRATOR == "imex":
+            return self._update_temperature_imex(temp, cells, dt, mid_temp)
+        if self._kernels is not None:
+            return self._kernels.update_temperature(
+                temp, cells, self._albedo_lut, self._insolation.field(self.day_phase_offset),
+                self.sun_screening, self.HEATING_RATE, self.COOLING_COEFFICIENT, self.T_space,
+                dt, mid_temp, self.WATER, self._heat.runs, self._heat_counts.ravel())
+        water = cells == self.WATER
+
+        # First pass: solar heating toward the albedo-weighted forcing
+        albedo = self._albedo_lut[cells]
+        intensity = self._insolation.field(self.day_phase_offset)
+        heating = temp + self.HEATING_RATE * (
+            self.sun_screening * intensity * (1 - albedo) - temp
+        )
+        heating[water] = mid_temp
+
+        # Second pass: neighbourhood average + radiative cooling
+        total = self._heat.sum(heating)
+        counts = np.broadcast_to(self._heat_counts, total.shape)
+        avg_heated = np.divide(total, counts, out=heating.copy(), where=counts > 0)
+        loss = self.COOLING_COEFFICIENT * (temp**4 - self.T_space**4)
+        new_temp = temp + dt * (self.HEATING_RATE * (avg_heated - loss))
+        new_temp[water] = mid_temp
+
+        return new_temp
+
+    def _update_temperature_imex(self, temp, cells, dt, mid_temp):
+        """
+        Semi-implicit version of update_temperature. Solar forcing stays
+        explicit; the neighbourhood average and the radiative loss are taken
+        at the new temperature T', with T'^4 linearised about T as
+        T^4 + 4T^3 (T' - T) (one Newton step). Per land cell, with
+        h = HEATING_RATE and c = COOLING_COEFFICIENT:
+
+            T' = T + dt*h*(avg(heating(T')) - (1 - h)*T' + (1 - h)*T
+                           - c*(T^4 + 4T^3 (T' - T) - T_space^4))
+
+        where heating(T') = (1 - h)*T' + h*forcing, so the explicit step's
+        diffusion is implicit and its (1 - h)*T growth term stays explicit.
+        The system is solved by fixed-point iteration on the neighbourhood
+        sum; each sweep contracts the error by at most
+        dt*h*(1 - h) / (1 + dt*h*(1 - h)), so it converges at any dt.
+
+        Converging is not the same as being accurate: the linearisation and the
+        lagged growth term are first order in dt. Under a still sun the result
+        stays within about 0.2 K of a fine explicit run up to dt = 2; past
+        dt ~ 5 the step is stable but only qualitatively right.
+        """
+        system = self._imex_system(temp, cells, dt, mid_temp)
+        new = self._imex_start(system, temp)
+        for _ in range(self.IMEX_MAX_ITERS):
+            nxt = self._imex_sweep(system, new)
+            max_diff = np.max(np.abs(nxt - new))
+            new = nxt
+            if max_diff < self.IMEX_TOL:
+                break
+        return new
+
+    def _imex_system(self, temp, cells, dt, mid_temp):
+        """The per-step terms of the IMEX solve that do not depend on T'."""
+        h = self.HEATING_RATE
+        water = cells == self.WATER
+        forcing = h * self.sun_screening * self._insolation.field(self.day_phase_offset) * (
+            1 - self._albedo_lut[cells])
+        growth = dt * h * (1 - h)
+        cooling = dt * h * self.COOLING_COEFFICIENT
+        t3 = temp ** 3
+        rhs = temp + growth * temp + cooling * (3 * t3 * temp + self.T_space ** 4)
+        diag = 1 + growth + 4 * cooling * t3
+        return water, forcing, rhs, diag, dt * h, mid_temp
+
+    def _imex_start(self, system, temp):
+        """The first iterate: T with water pinned to mid_temp."""
+        water, mid_temp = system[0], system[5]
+        new = temp.copy()
+        new[water] = mid_temp
+        return new
+
+    def _imex_sweep(self, system, new):
+        """One fixed-point sweep of the IMEX solve from the iterate `new`."""
+        water, forcing, rhs, diag, coupling, mid_temp = system
+        heating = (1 - self.HEATING_RATE) * new + forcing
+        heating[water] = mid_temp
+        total = self._heat.sum(heating)
+        counts = np.broadcast_to(self._heat_counts, total.shape)
+        avg_heated = np.divide(total, counts, out=heating.copy(), where=counts > 0)
+        nxt = (rhs + coupling * avg_heated) / diag
+        nxt[water] = mid_temp
+        return nxt
+
+    def equilibrium_temp(self):
+        """compute_equilibrium_temp(), looked up in config["equilibrium_cache"] when set."""
+        if not self.EQUILIBRIUM_CACHE:
+            return self.compute_equilibrium_temp()
+        from eqcache import EquilibriumCache
+        with EquilibriumCache(self.EQUILIBRIUM_CACHE) as cache:
+            return cache.lookup(self)
+
+    def compute_equilibrium_temp(self, dt=0.1):
+        """
+        Relaxes a bare (ALBEDO_BARE) planet from ambient temperature under the moving
+        day-night forcing and returns its mean temperature.
+
+        Albedo is uniform and the forcing depends only on x, so a field that starts
+        uniform in y stays uniform in y: the clamped 3x3 average of identical rows,
+        edge rows included, is just the 3-column average. The sweep therefore runs
+        on a single column profile, with the first/last columns averaging over 2.
+        """
+        # with latitude forcing this is the planet-average forcing
+        solar = self.sun_screening * (1 - self.ALBEDO_BARE) * self._insolation.mean_weight()
+        if self._kernels is not None:
+            table = self._insolation.table
+            temp = self._kernels.equilibrium_profile(
+                self.GRID_WIDTH, self.ambient_temperature, solar, self.HEATING_RATE,
+                self.COOLING_COEFFICIENT, self.T_space, dt, self.DAY_BORDER_SPEED,
+                self.MAX_ITERS_TMID, self.THRESHOLD_TMID,
+                np.zeros((0, 0)) if table is None else table, self._insolation.resolution)
+            return float(np.mean(temp))
+
+        temp = np.full(self.GRID_WIDTH, self.ambient_temperature, dtype=float)
+        counts = np.full(self.GRID_WIDTH, 3.0)
+        counts[0] -= 1
+        counts[-1] -= 1
+        counts = np.maximum(counts, 1.0)
+        day_phase = 0.0
+
+        for _ in range(self.MAX_ITERS_TMID):
+            # First pass: day‑night heating
+            intensity = self._insolation.row(day_phase)
+            heating = temp + self.HEATING_RATE * (solar * intensity - temp)
+
+            # Second pass: diffusion + radiative cooling
+            total = heating.copy()
+            total[1:] += heating[:-1]
+            total[:-1] += heating[1:]
+            avg_heated = total / counts
+            loss = self.COOLING_COEFFICIENT * (temp**4 - self.T_space**4)
+            new = temp + dt * (self.HEATING_RATE * (avg_heated - loss))
+
+            day_phase = (day_phase - self.DAY_BORDER_SPEED * dt) % self.GRID_WIDTH
+
+            max_diff = np.max(np.abs(new - temp))
+            temp = new
+            if max_diff < self.THRESHOLD_TMID:
+                break
+
+        # Return average equilibrium temperature
+        return float(np.mean(temp))
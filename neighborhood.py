@@ -0,0 +1,157 @@
+import numpy as np
+
+def neighborhood_offsets(level, include_center):
+    """
+    Returns the (dy, dx) offsets of an INFLUENCE_LEVEL neighbourhood:
+    level 1 = 4-way, level 2 = 8-way, >2 = circular.
+    """
+    r = level
+    offsets = []
+    for dy in range(-r, r + 1):
+        for dx in range(-r, r + 1):
+            if dx == 0 and dy == 0 and not include_center:
+                continue
+            if r == 1 and abs(dx) + abs(dy) != 1:
+                continue
+            if r > 2 and (dx*dx + dy*dy) ** 0.5 > r:
+                continue
+            offsets.append((dy, dx))
+    return offsets
+
+def kernel_runs(offsets):
+    """
+    The kernel as horizontal runs: an (n, 3) array of (dy, first dx, last dx)
+    covering every offset exactly once. Loop-structured code can then sum a
+    run in O(1) from a row prefix sum, so per-cell work grows with the
+    kernel's height rather than its area.
+    """
+    runs = []
+    for dy in sorted({dy for dy, _ in offsets}):
+        dxs = sorted(dx for oy, dx in offsets if oy == dy)
+        start = prev = dxs[0]
+        for dx in dxs[1:]:
+            if dx != prev + 1:
+                runs.append((dy, start, prev))
+                start = dx
+            prev = dx
+        runs.append((dy, start, prev))
+    return np.array(runs, dtype=np.intp).reshape(-1, 3)
+
+class Neighborhood:
+    """
+    Neighbourhood sums over a fixed kernel on a (height, width) grid that is
+    periodic in x and clamped in y (rows outside the map contribute nothing).
+
+    The kernel is built once per influence level, along with whatever the
+    chosen method needs, so sum() costs the same per cell whatever the radius:
+      - "shift": one shifted add per offset (the 4-way level 1 kernel)
+      - "box":   square kernels (level 2) from prefix sums along x and then y,
+                 i.e. a summed-area table taken one axis at a time
+      - "fft":   circular kernels (level > 2) as one FFT convolution with the
+                 kernel's precomputed spectrum
+    Integer and boolean fields come back as exact integer-valued floats.
+    """
+    def __init__(self, level, height, width, include_center=True):
+        self.level = level
+        self.height = height
+        self.width = width
+        self.include_center = include_center
+        self.offsets = neighborhood_offsets(level, include_center)
+        self.radius = max(max(abs(dy), abs(dx)) for dy, dx in self.offsets)
+        self.dys = np.array([dy for dy, _ in self.offsets], dtype=np.intp)
+        self.dxs = np.array([dx for _, dx in self.offsets], dtype=np.intp)
+        self.runs = kernel_runs(self.offsets)
+        if level == 1:
+            self.method = "shift"
+        elif level == 2:
+            self.method = "box"
+        else:
+            self.method = "fft"
+            # built on the first sum(), so a model that never sums pays nothing
+            self._spectrum = None
+
+    def _build_spectrum(self):
+        # rows height..fft_height-1 stay zero, so y wrap-around of the circular
+        # convolution only ever reads padding
+        self.fft_height = self.height + self.radius
+        kernel = np.zeros((self.fft_height, self.width))
+        for dy, dx in self.offsets:
+            if abs(dy) < self.height:
+                # correlation: result[y, x] += field[y + dy, x + dx]
+                kernel[-dy % self.fft_height, -dx % self.width] += 1
+        self._spectrum = np.fft.rfft2(kernel)
+
+    def row_counts(self):
+        """How many kernel cells fall on the map for each row, as a (height, 1) column."""
+        rows = np.arange(self.height)[:, None] + self.dys
+        return ((rows >= 0) & (rows < self.height)).sum(axis=1, keepdims=True).astype(float)
+
+    def neighbors(self, cells):
+        """
+        Flat indices of the kernel cells around each flat index in `cells`, as a
+        (len(cells), len(offsets)) array, plus a mask of the ones on the map.
+        The kernels are symmetric, so these are also the cells whose
+        neighbourhood contains each of `cells`.
+        """
+        y, x = np.divmod(np.asarray(cells, dtype=np.intp), self.width)
+        ny = y[:, None] + self.dys
+        nx = (x[:, None] + self.dxs) % self.width
+        valid = (ny >= 0) & (ny < self.height)
+        return ny * self.width + nx, valid
+
+    def sum(self, field):
+        """Sums field[y + dy][(x + dx) % width] over the kernel for every cell at once."""
+        field = np.asarray(field)
+        exact = field.dtype.kind in "biu"
+        if self.method == "shift":
+            return self._shift_sum(field.astype(float))
+        if self.method == "box":
+            total = self._box_sum(field.astype(np.int64 if exact else float))
+        else:
+            total = self._fft_sum(field.astype(float))
+            if exact:
+                total = np.rint(total)
+        return total.astype(float)
+
+    def _shift_sum(self, field):
+        height, width = field.shape
+        total = np.zeros(field.shape)
+        # wrap-padded copy so every x shift is a view: padded[:, r + dx + x] == field[:, (x + dx) % width]
+        r = self.radius
+        padded = np.take(field, np.arange(-r, width + r), axis=1, mode='wrap')
+        for dy, dx in self.offsets:
+            if dy >= height or -dy >= height:
+                continue
+            shifted = padded[:, r + dx:r + dx + width]
+            if dy > 0:
+                total[:height - dy] += shifted[dy:]
+            elif dy < 0:
+                total[-dy:] += shifted[:height + dy]
+            else:
+                total += shifted
+        return total
+
+    def _box_sum(self, field):
+        height, width = field.shape
+        r = self.radius
+        n = 2 * r + 1
+        # prefix sums along x over a wrap-padded copy (leading zero column)
+        padded = np.take(field, np.arange(-r, width + r), axis=1, mode='wrap')
+        prefix = np.zeros((height, width + n), dtype=field.dtype)
+        np.cumsum(padded, axis=1, out=prefix[:, 1:])
+        rows = prefix[:, n:] - prefix[:, :-n]
+        # then along y over a zero-padded copy (rows off the map add nothing)
+        prefix = np.zeros((height + n, width), dtype=field.dtype)
+        np.cumsum(rows, axis=0, out=prefix[r + 1:r + 1 + height])
+        prefix[r + 1 + height:] = prefix[r + height]
+        total = prefix[n:] - prefix[:-n]
+        if not self.include_center:
+            total -= field
+        return total
+
+    def _fft_sum(self, field):
+        if self._spectrum is None:
+            self._build_spectrum()
+        height, width = field.shape
+        spectrum = np.fft.rfft2(field, s=(self.fft_height, width))
+        return np.fft.irfft2(spectrum * self._spectrum, s=(self.fft_height, width))[:height]
@@ -0,0 +1,107 @@
+import math
+import numpy as np
+import pygame
+
+class TemperatureOverlay:
+    """
+    Translucent isometric temperature layer drawn with array operations.
+
+    The diamond geometry never changes during a run, so it is rasterised once
+    into `cell_index`: for every pixel of the layer, the cell whose diamond
+    covers it (drawn in the same row-major order as pygame would paint them,
+    so overlaps resolve the same way), or `n_cells` where no diamond does.
+    Each frame then maps temperatures to colours through a lookup table and
+    gathers one colour per pixel into a reused SRCALPHA surface.
+    """
+    def __init__(self, grid_width, grid_height, cell_size, thickness, lut_size=1024):
+        self.grid_width = grid_width
+        self.grid_height = grid_height
+        self.n_cells = grid_width * grid_height
+        self.lut_size = lut_size
+        half, quarter = cell_size // 2, cell_size // 4
+        tile_height = cell_size // 2
+        self.half_w = cell_size // 2
+        self.half_h = int(tile_height * thickness) // 2
+        # Vertical lift of the layer above the terrain (before gap_between_layers)
+        self.lift = int(tile_height / math.tan(math.radians(30))) * 3
+        # Where cell (0, 0) sits inside the layer
+        self.origin = ((grid_height - 1) * half + self.half_w, self.half_h)
+        self.size = ((grid_width + grid_height - 2) * half + 2 * self.half_w + 1,
+                     (grid_width + grid_height - 2) * quarter + 2 * self.half_h + 1)
+        self.cell_index = self._rasterise(half, quarter)
+        self.surface = pygame.Surface(self.size, pygame.SRCALPHA)
+        self.surface.fill((0, 0, 0, 0))
+        alpha = pygame.surfarray.pixels_alpha(self.surface)
+        alpha[self.cell_index < self.n_cells] = 128
+        del alpha
+        self._lut_low, self._lut_high = self._build_luts(lut_size)
+        self._rgb = np.zeros((self.n_cells + 1, 3), dtype=np.uint8)
+        self._pixels = np.empty(self.cell_index.shape + (3,), dtype=np.uint8)
+
+    def _rasterise(self, half, quarter):
+        """Pixel -> cell map, as a (width, height) array like pygame.surfarray uses."""
+        ids = pygame.Surface(self.size, depth=32)
+        ids.fill((0, 0, 0))
+        ox, oy = self.origin
+        for y in range(self.grid_height):
+            for x in range(self.grid_width):
+                cx = ox + (x - y) * half
+                cy = oy + (x + y) * quarter
+                i = y * self.grid_width + x + 1
+                color = (i >> 16 & 255, i >> 8 & 255, i & 255)
+                pygame.draw.polygon(ids, color, [
+                    (cx, cy - self.half_h),
+                    (cx + self.half_w, cy),
+                    (cx, cy + self.half_h),
+                    (cx - self.half_w, cy),
+                ])
+        rgb = pygame.surfarray.array3d(ids).astype(np.int64)
+        index = (rgb[..., 0] << 16 | rgb[..., 1] << 8 | rgb[..., 2]) - 1
+        index[index < 0] = self.n_cells
+        return index.astype(np.intp)
+
+    @staticmethod
+    def _build_luts(size):
+        """
+        Colour ramps over a normalised coordinate u in [0, 1]: below the mean,
+        blue fading to white as (u ** 0.3); above it, white fading to red.
+        """
+        u = np.linspace(0.0, 1.0, size)
+        low = np.empty((size, 3), dtype=np.uint8)
+        v = (255 * u ** 0.3).astype(np.uint8)
+        low[:, 0] = v
+        low[:, 1] = v
+        low[:, 2] = 255
+        high = np.empty((size, 3), dtype=np.uint8)
+        v = (255 * (1 - u)).astype(np.uint8)
+        high[:, 0] = 255
+        high[:, 1] = v
+        high[:, 2] = v
+        return low, high
+
+    def colors(self, temps, threshold):
+        """
+        RGB per cell: cells at or below the mean are scaled against
+        [min, mean], the rest against [mean, max]; each span is at least
+        `threshold` wide so a flat field does not blow up the ramp.
+        """
+        t = np.ravel(temps)
+        tmin, tmax, mean = t.min(), t.max(), t.mean()
+        low = t <= mean
+        top = self.lut_size - 1
+        u = np.where(low, (t - tmin) / max(mean - tmin, threshold),
+                     (t - mean) / max(tmax - mean, threshold))
+        q = np.clip(np.rint(u * top), 0, top).astype(np.intp)
+        rgb = self._rgb
+        rgb[:-1] = np.where(low[:, None], self._lut_low[q], self._lut_high[q])
+        return rgb
+
+    def draw(self, screen, temps, origin_x, origin_y, shift_x, shift_y, gap, threshold):
+        """Colours the layer for `temps` and blits it above the terrain at origin_x/origin_y."""
+        np.take(self.colors(temps, threshold), self.cell_index, axis=0, out=self._pixels)
+        pixels = pygame.surfarray.pixels3d(self.surface)
+        pixels[...] = self._pixels
+        del pixels
+        x = origin_x + shift_x - self.origin[0]
+        y = origin_y - self.lift - gap + shift_y - self.origin[1]
+        screen.blit(self.surface, (int(round(x)), int(round(y))))
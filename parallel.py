@@ -0,0 +1,294 @@
+"""
+Strip-decomposed stepping of one large world on several cores.
+
+The grid is cut into horizontal strips, one worker process per strip. Grid
+and temperature live in multiprocessing.shared_memory, double-buffered: every
+step reads the current buffers and writes the other pair, so a worker never
+overwrites rows its neighbours are still reading. A strip's halo is the
+INFLUENCE_LEVEL rows above and below it, read straight out of the neighbours'
+part of the shared arrays, and each step runs in two phases separated by a
+barrier:
+
+  1. temperature: the strip plus its halo is advanced with the ordinary
+     DaisyworldModel.update_temperature and the strip's own rows are written
+     (under INTEGRATOR="imex" the solve couples the whole map, so the strips
+     instead run its sweeps in lockstep, trading halo rows and their largest
+     change through shared memory after every sweep)
+  2. ecology: the same for update_grid, reading the new temperatures of the
+     halo rows that phase 1 of the neighbouring strips has just written
+
+Rows are periodic in x inside every strip, and the y clamp only ever applies
+at the top and bottom of the map: a strip's block reaches the map edge there
+and stops at its halo elsewhere, and the halo rows themselves (whose results
+are thrown away) are the only ones that see the block's own edge.
+
+Each strip draws from its own Generator, seeded per step from the run's
+strip_seed, the strip number and the step number. A seeded run is therefore
+reproducible (and resumable from a checkpoint) for a given number of
+workers, but is not the same sample path as the single-process model.
+"""
+import multiprocessing
+import os
+import threading
+from multiprocessing import shared_memory
+from multiprocessing.connection import wait
+from threading import BrokenBarrierError
+import numpy as np
+from constants import CELL_SIZE
+from model import DaisyworldModel
+from insolation import Insolation, cosine_latitude_weights
+
+# Layout of the shared step parameters (float64) and step clock (int64)
+_DT, _DAY_PHASE, _SUN, _PEAK, _MID_TEMP = range(5)
+_STEP, _PARITY, _STOP, _SEED = range(4)
+
+def _shared_array(shape, dtype, name=None):
+    """An ndarray over a shared memory block, created (name=None) or attached by name."""
+    size = max(int(np.prod(shape)) * np.dtype(dtype).itemsize, 1)
+    if name is None:
+        shm = shared_memory.SharedMemory(create=True, size=size)
+    else:
+        shm = shared_memory.SharedMemory(name=name)
+    return shm, np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+def strip_bounds(height, n):
+    """Row ranges [y0, y1) of n strips of (nearly) equal height covering the map."""
+    edges = np.linspace(0, height, n + 1).round().astype(int)
+    return list(zip(edges[:-1], edges[1:]))
+
+def _strip_model(config, b0, b1, height):
+    """A DaisyworldModel sized to rows [b0, b1) of a map `height` rows high."""
+    strip = {k: v for k, v in config.items() if k != "scenario_map"}
+    strip["map_height"] = (b1 - b0) * CELL_SIZE
+    model = DaisyworldModel(strip)
+    if model.LATITUDE_FORCING:
+        # the strip's rows keep their latitude on the whole map
+        model._insolation = Insolation(model.GRID_WIDTH, model.INSOLATION_RESOLUTION,
+                                       cosine_latitude_weights(height)[b0:b1])
+    return model
+
+def _imex_strip(local, cells, dt, mid_temp, temps, cur, nxt, iterate, sweep_diffs, index,
+                b0, rows, phase):
+    """
+    The IMEX temperature solve for rows [y0, y1), written to temps[nxt].
+
+    Mirrors DaisyworldModel._update_temperature_imex on the whole map: each
+    sweep reads the previous iterate's block (halo included) from the shared
+    buffers, writes its own rows, and the strips agree after a barrier on the
+    largest change anywhere, so they stop on the same sweep as a serial run.
+    Iterates alternate between temps[nxt] and `iterate`; a buffer is only
+    rewritten two sweeps after it was read, with a barrier in between.
+    """
+    y0, y1 = rows
+    b1 = b0 + cells.shape[0]
+    own = slice(y0 - b0, y1 - b0)
+    buffers = (temps[nxt], iterate)
+    system = local._imex_system(temps[cur, b0:b1], cells, dt, mid_temp)
+    new = local._imex_start(system, temps[cur, b0:b1])
+    sweep = 0
+    for sweep in range(local.IMEX_MAX_ITERS):
+        if sweep:
+            new = buffers[(sweep - 1) % 2][b0:b1]
+        nxt_temp = local._imex_sweep(system, new)
+        buffers[sweep % 2][y0:y1] = nxt_temp[own]
+        sweep_diffs[sweep % 2, index] = np.max(np.abs(nxt_temp[own] - new[own]))
+        phase.wait()
+        if sweep_diffs[sweep % 2].max() < local.IMEX_TOL:
+            break
+    if sweep % 2:
+        temps[nxt, y0:y1] = iterate[y0:y1]
+
+def _iterate_shape(config, shape):
+    """Shape of the shared IMEX iterate buffer; empty unless the run uses IMEX."""
+    return shape if config.get("INTEGRATOR") == "imex" else (0,) + shape[1:]
+
+def _strip_worker(config, names, shape, n_strips, index, rows, halo, start, phase, done):
+    """Worker process: steps rows [y0, y1) every time the parent releases `start`."""
+    grid_shm, grids = _shared_array((2,) + shape, np.uint8, names[0])
+    temp_shm, temps = _shared_array((2,) + shape, np.float64, names[1])
+    params_shm, params = _shared_array((5,), np.float64, names[2])
+    clock_shm, clock = _shared_array((4,), np.int64, names[3])
+    delta_shm, deltas = _shared_array((n_strips, 4), np.int64, names[4])
+    iterate_shm, iterate = _shared_array(_iterate_shape(config, shape), np.float64, names[5])
+    diffs_shm, sweep_diffs = _shared_array((2, n_strips), np.float64, names[6])
+    shms = [grid_shm, temp_shm, params_shm, clock_shm, delta_shm, iterate_shm, diffs_shm]
+    height, width = shape
+    y0, y1 = rows
+    b0, b1 = max(0, y0 - halo), min(height, y1 + halo)
+    own = slice(y0 - b0, y1 - b0)
+    # flat indices (within the block) of the strip's own cells
+    own_lo, own_hi = (y0 - b0) * width, (y1 - b0) * width
+    local = _strip_model(config, b0, b1, height)
+    cells = None
+    try:
+        while True:
+            start.wait()
+            if clock[_STOP]:
+                break
+            cur = int(clock[_PARITY])
+            nxt = 1 - cur
+            dt = float(params[_DT])
+            local.day_phase_offset = float(params[_DAY_PHASE])
+            local.sun_screening = float(params[_SUN])
+            local.peak_growth = float(params[_PEAK])
+
+            cells = grids[cur, b0:b1]
+            if local.INTEGRATOR == "imex":
+                _imex_strip(local, cells, dt, float(params[_MID_TEMP]), temps, cur, nxt,
+                            iterate, sweep_diffs, index, b0, rows, phase)
+            else:
+                temp = local.update_temperature(temps[cur, b0:b1], cells, dt,
+                                                float(params[_MID_TEMP]))
+                temps[nxt, y0:y1] = temp[own]
+            phase.wait()
+
+            local.rng = np.random.default_rng([int(clock[_SEED]), index, int(clock[_STEP])])
+            new = local.update_grid(cells, temps[nxt, b0:b1], dt)
+            grids[nxt, y0:y1] = new[own]
+            changed = local.changed[(local.changed >= own_lo) & (local.changed < own_hi)]
+            deltas[index] = (np.bincount(new.flat[changed], minlength=4)
+                             - np.bincount(cells.flat[changed], minlength=4))
+            done.wait()
+    except BrokenBarrierError:
+        pass
+    except BaseException:
+        # wake everybody up rather than leave them waiting on a dead strip
+        for barrier in (start, phase, done):
+            barrier.abort()
+        raise
+    finally:
+        del grids, temps, params, clock, deltas, iterate, sweep_diffs, cells
+        for shm in shms:
+            shm.close()
+
+class ParallelModel(DaisyworldModel):
+    """
+    DaisyworldModel stepped by `workers` strip processes (default: one per
+    core, at most one per row). Reset, checkpoints and diagnostics work as on
+    the base model; grid and temp_grid are views of the shared buffers, valid
+    until the next step. Per-step changed cells are not collected, so
+    `changed` is None. Call close() (or use it as a context manager) to stop
+    the workers and release the shared memory.
+    """
+    def __init__(self, config, workers=None, rng=None):
+        super().__init__(config, rng=rng)
+        # the parent only counts cells; the strips do all neighbourhood work
+        self.ACTIVE_SET = False
+        self.changed = None
+        self.workers = max(1, min(workers or os.cpu_count() or 1, self.GRID_HEIGHT))
+        self.strips = strip_bounds(self.GRID_HEIGHT, self.workers)
+        shape = (self.GRID_HEIGHT, self.GRID_WIDTH)
+        self._shape = shape
+        self._grid_shm, self._grids = _shared_array((2,) + shape, np.uint8)
+        self._temp_shm, self._temps = _shared_array((2,) + shape, np.float64)
+        self._params_shm, self._params = _shared_array((5,), np.float64)
+        self._clock_shm, self._clock = _shared_array((4,), np.int64)
+        self._delta_shm, self._deltas = _shared_array((self.workers, 4), np.int64)
+        self._iterate_shm, _ = _shared_array(_iterate_shape(self.config, shape), np.float64)
+        self._diffs_shm, _ = _shared_array((2, self.workers), np.float64)
+        self._parity = 0
+        self.strip_seed = 0
+        self._processes = []
+        self._closing = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _share(self):
+        """Moves grid and temp_grid into the shared buffers."""
+        self._parity = 0
+        self._grids[0] = self.grid
+        self._temps[0] = self.temp_grid
+        self.grid = self._grids[0]
+        self.temp_grid = self._temps[0]
+
+    def reset(self):
+        super().reset()
+        self.strip_seed = int(self.rng.integers(2**62))
+        self._share()
+
+    def set_state(self, state):
+        super().set_state(state)
+        if "strip_seed" in state:
+            self.strip_seed = int(state["strip_seed"])
+        else:
+            self.strip_seed = int(self.rng.integers(2**62))
+        self._share()
+
+    def get_state(self):
+        state = super().get_state()
+        state["grid"] = np.array(self.grid)
+        state["temp_grid"] = np.array(self.temp_grid)
+        state["strip_seed"] = self.strip_seed
+        return state
+
+    def _start_workers(self):
+        ctx = multiprocessing.get_context("spawn")
+        self._start = ctx.Barrier(self.workers + 1)
+        self._phase = ctx.Barrier(self.workers)
+        self._done = ctx.Barrier(self.workers + 1)
+        names = [shm.name for shm in (self._grid_shm, self._temp_shm, self._params_shm,
+                                      self._clock_shm, self._delta_shm, self._iterate_shm,
+                                      self._diffs_shm)]
+        config = {k: v for k, v in self.config.items() if k != "scenario_map"}
+        halo = self._heat.radius
+        for index, rows in enumerate(self.strips):
+            process = ctx.Process(
+                target=_strip_worker, daemon=True,
+                args=(config, names, self._shape, self.workers, index, rows, halo,
+                      self._start, self._phase, self._done))
+            process.start()
+            self._processes.append(process)
+        threading.Thread(target=self._watch, args=(list(self._processes),), daemon=True).start()
+
+    def _watch(self, processes):
+        """Breaks the step barriers if a worker exits while the run still needs it."""
+        wait([process.sentinel for process in processes])
+        if not self._closing:
+            self._start.abort()
+            self._done.abort()
+
+    def step(self, dt):
+        """Advances the whole map by dt, one strip per worker process."""
+        if not self._processes:
+            self._start_workers()
+        self.day_phase_offset = (self.day_phase_offset - self.DAY_BORDER_SPEED * dt) % self.GRID_WIDTH
+        self._params[:] = (dt, self.day_phase_offset, self.sun_screening, self.peak_growth,
+                           self.mid_temp)
+        self._clock[:] = (self.step_count, self._parity, 0, self.strip_seed)
+        try:
+            self._start.wait()
+            self._done.wait()
+        except BrokenBarrierError:
+            raise RuntimeError("a strip worker failed; see its traceback above") from None
+        self._parity = 1 - self._parity
+        self.grid = self._grids[self._parity]
+        self.temp_grid = self._temps[self._parity]
+        self.cell_counts += self._deltas.sum(axis=0)
+        self.step_count += 1
+
+    def close(self):
+        """Stops the workers and frees the shared memory; grid/temp_grid become plain copies."""
+        if self._grids is None:
+            return
+        self._closing = True
+        if self._processes:
+            self._clock[_STOP] = 1
+            try:
+                self._start.wait(timeout=10)
+            except BrokenBarrierError:
+                pass
+            for process in self._processes:
+                process.join()
+            self._processes = []
+        if self.grid is not None:
+            self.grid = np.array(self.grid)
+            self.temp_grid = np.array(self.temp_grid)
+        self._grids = self._temps = self._params = self._clock = self._deltas = None
+        for shm in (self._grid_shm, self._temp_shm, self._params_shm, self._clock_shm,
+                    self._delta_shm, self._iterate_shm, self._diffs_shm):
+            shm.close()
+            shm.unlink()
@@ -0,0 +1,136 @@
+import csv
+import threading
+import time
+from collections import deque
+
+# Phases of one window frame, in the order the event loop runs them
+FRAME_PHASES = ["wait", "events", "sync", "terrain", "overlay", "stats", "ui", "flip"]
+# Phases of one model step (timed on the worker thread)
+SIM_PHASES = ["temperature", "ecology"]
+
+class Profiler:
+    """
+    Per-phase timings of the windowed run over a rolling window of frames.
+
+    The event loop brackets every frame with begin_frame()/end_frame() and
+    calls lap(phase) as each phase finishes, which charges the time since the
+    previous lap to that phase. The model, stepping on the worker thread,
+    reports its own phases through record_sim(). While disabled, begin_frame
+    does nothing and lap() / end_frame() return on their first check, so the
+    hooks can stay in the loop; the model is only handed the profiler while
+    it is enabled.
+
+    Every finished frame can also be streamed to a CSV trace (start_trace).
+    """
+    def __init__(self, window=120):
+        self.window = window
+        self.enabled = False
+        self._frames = deque(maxlen=window)
+        self._current = None
+        self._frame_start = 0.0
+        self._last = 0.0
+        # worker-side totals since the last end_frame()
+        self._lock = threading.Lock()
+        self._sim = dict.fromkeys(SIM_PHASES, 0.0)
+        self._steps = 0
+        self._frame_count = 0
+        self._trace_file = None
+        self._trace = None
+
+    @property
+    def tracing(self):
+        return self._trace is not None
+
+    def enable(self, enabled):
+        """Turns timing on or off; switching it on starts a fresh window."""
+        if enabled and not self.enabled:
+            self._frames.clear()
+            with self._lock:
+                self._sim = dict.fromkeys(SIM_PHASES, 0.0)
+                self._steps = 0
+        self.enabled = enabled
+        if not enabled:
+            self._current = None
+
+    # --- Event loop side ---
+    def begin_frame(self):
+        if not self.enabled:
+            return
+        self._frame_start = self._last = time.perf_counter()
+        self._current = dict.fromkeys(FRAME_PHASES, 0.0)
+
+    def lap(self, phase):
+        """Charges the time since the previous lap (or begin_frame) to `phase`."""
+        if self._current is None:
+            return
+        now = time.perf_counter()
+        self._current[phase] += now - self._last
+        self._last = now
+
+    def end_frame(self):
+        current = self._current
+        if current is None:
+            return
+        self._current = None
+        with self._lock:
+            sim, self._sim = self._sim, dict.fromkeys(SIM_PHASES, 0.0)
+            steps, self._steps = self._steps, 0
+        record = dict(current)
+        record.update(sim)
+        record["frame"] = self._last - self._frame_start
+        record["steps"] = steps
+        self._frames.append(record)
+        self._frame_count += 1
+        if self._trace is not None:
+            self._trace.writerow(
+                [self._frame_count, f"{self._frame_start:.6f}", f"{record['frame'] * 1000:.3f}"]
+                + [f"{record[p] * 1000:.3f}" for p in FRAME_PHASES + SIM_PHASES] + [steps])
+
+    # --- Worker side ---
+    def record_sim(self, phase, start, steps=0):
+        """Charges perf_counter() - start to a model phase; returns the current time."""
+        now = time.perf_counter()
+        with self._lock:
+            self._sim[phase] += now - start
+            self._steps += steps
+        return now
+
+    # --- Reports ---
+    def summary(self):
+        """
+        Averages over the window: ms per frame for each frame phase, ms per step
+        for each model phase, frames per second and simulated steps per second.
+        """
+        frames = list(self._frames)
+        wall = sum(f["frame"] for f in frames)
+        steps = sum(f["steps"] for f in frames)
+        n = max(len(frames), 1)
+        result = {p: 1000 * sum(f[p] for f in frames) / n for p in FRAME_PHASES}
+        result.update({p: 1000 * sum(f[p] for f in frames) / max(steps, 1) for p in SIM_PHASES})
+        result["fps"] = len(frames) / wall if wall > 0 else 0.0
+        result["steps_per_second"] = steps / wall if wall > 0 else 0.0
+        return result
+
+    def hud_lines(self):
+        """The summary as short text lines for the on-screen HUD."""
+        s = self.summary()
+        lines = [f"{s['fps']:5.1f} fps  {s['steps_per_second']:6.1f} steps/s"]
+        lines += [f"{p:<12s}{s[p]:7.2f} ms" for p in FRAME_PHASES]
+        lines += [f"{p:<12s}{s[p]:7.2f} ms/step" for p in SIM_PHASES]
+        if self.tracing:
+            lines.append("recording trace")
+        return lines
+
+    def start_trace(self, path):
+        """Streams one CSV row per frame (all times in ms) to path until stop_trace()."""
+        self.stop_trace()
+        self._trace_file = open(path, "w", newline="")
+        self._trace = csv.writer(self._trace_file)
+        self._trace.writerow(["frame", "time_s", "frame_ms"]
+                             + [f"{p}_ms" for p in FRAME_PHASES + SIM_PHASES] + ["steps"])
+
+    def stop_trace(self):
+        if self._trace_file is not None:
+            self._trace_file.close()
+        self._trace_file = None
+        self._trace = None
@@ -1,12 +1,20 @@
 import pygame
-import random
 import os
 import math
+import numpy as np
 from constants import CELL_SIZE, EMPTY, WHITE_DAISY, BLACK_DAISY, WATER
+from model import DaisyworldModel
+from checkpoint import save_checkpoint
+from stats import extreme_means, RingBuffer
+from overlay import TemperatureOverlay
+from worker import SimulationWorker
+from profiler import Profiler
 
 class DaisyworldSimulation:
     def __init__(self, config):
         self.config = config
+        # The display-free model owns the grid, temperatures and physics parameters
+        self.model = DaisyworldModel(config)
         # Fixed constants (could also be class attributes if they never change)
         self.cell_size = CELL_SIZE  # Base cell size in pixels
         self.tile_width = self.cell_size  # For isometric rendering
@@ -16,36 +24,25 @@ class DaisyworldSimulation:
         self.dragging_brush = False
         self.brush_drag_start_y = 0
         self.brush_start_offset = 0
-        self.time_flow = int(config.get("time_flow", 100))
-        # Simulation parameters from config with defaults
+        # Display parameters from config with defaults
         self.temp_thickness = float(config.get("temp_thickness", 3))
-        self.T_space = float(config.get("T_space", 2.7))
-        self.SUN_SCREENING = float(config.get("SUN_SCREENING", 1900))
-        self.HEAT_DIFFUSION_COEFFICIENT = float(config.get("HEAT_DIFFUSION_COEFFICIENT", 0.2))
-        self.HEATING_RATE = float(config.get("HEATING_RATE", 0.2))
-        self.INITIAL_TEMPERATURE = float(config.get("INITIAL_TEMPERATURE", 500))
-        self.ALBEDO_BLACK = float(config.get("ALBEDO_BLACK", 0.25))
-        self.ALBEDO_WHITE = float(config.get("ALBEDO_WHITE", 0.75))
-        self.ALBEDO_BARE = float(config.get("ALBEDO_BARE", 0.5))
-        self.ALBEDO_WATER = float(config.get("ALBEDO_WATER", 0.9))
-        self.HEAT_RETENTION = float(config.get("HEAT_RETENTION", 0.1))
-        self.T_OPTIMAL = float(config.get("T_OPTIMAL", 500))
-        # single “average” tolerance for backward compatibility
-        self.T_TOLERANCE = float(config.get("T_TOLERANCE", 50))
-        # separate low/high tolerances
-        self.T_TOL_LOW  = float(config.get("T_TOL_LOW", self.T_TOLERANCE))
-        self.T_TOL_HIGH = float(config.get("T_TOL_HIGH", self.T_TOLERANCE))
-        self.SPREAD_CHANCE = float(config.get("SPREAD_CHANCE", 0.2))
-        self.DEATH_CHANCE = float(config.get("DEATH_CHANCE", 0.05))
-        self.COOLING_COEFFICIENT = float(config.get("COOLING_COEFFICIENT", 9e-9))
         self.CUM_MOR_NET = float(config.get("CUM_MOR_NET", 500))
-        self.DAY_BORDER_SPEED = float(config.get("DAY_BORDER_SPEED", 30))
-        self.DAY_PERIOD = float(config.get("DAY_PERIOD", 60.0))
         self.THRESHOLD = float(config.get("THRESHOLD", 1))
-        self.THRESHOLD_TMID = float(config.get("THRESHOLD_TMID", 1))
-        self.MAX_ITERS_TMID = int(config.get("MAX_ITERS_TMID", 200))
-        self.INFLUENCE_LEVEL = int(config.get("INFLUENCE_LEVEL", 1))
         self.MAX_HISTORY = 1000  # Fixed history length for graphs
+        # Fixed-step clock of the background worker: the model always advances by
+        # SIM_DT, as many times as wall time x time_flow requires, up to MAX_SUBSTEPS
+        self.MAX_SUBSTEPS = int(config.get("MAX_SUBSTEPS", 32))
+        self.MAX_FRAME_TIME = float(config.get("MAX_FRAME_TIME", 0.25))
+        # Changed-cell fraction above which the terrain is rebuilt instead of repainted
+        self.REPAINT_LIMIT = float(config.get("REPAINT_LIMIT", 0.05))
+        # Started by run(); owns the model from then on
+        self.worker = None
+        # Per-phase frame timings: F3 toggles the HUD, F4 records a CSV trace
+        self.profiler = Profiler(int(config.get("PROFILE_WINDOW", 120)))
+        self.profile_path = config.get("profile_path", "profile.csv")
+        self.show_profiler = False
+        self._live = {name: getattr(self.model, name)
+                      for name in ("time_flow", "sun_screening", "peak_growth")}
         self.time_minus_rect = pygame.Rect(0,0,0,0)
         self.time_plus_rect  = pygame.Rect(0,0,0,0)
         # Daisy types
@@ -53,7 +50,6 @@ class DaisyworldSimulation:
         self.BLACK_DAISY = BLACK_DAISY
         self.WHITE_DAISY = WHITE_DAISY
         self.WATER = WATER
-        self.sun_screening = float(config.get("sun_screening", self.SUN_SCREENING))
 
         # Colors for simulation
         self.COLOR_BARE = (139, 69, 19)
@@ -65,32 +61,45 @@ class DaisyworldSimulation:
         self.COLOR_BORDER = (0, 0, 0)
         self.COLOR_TEXT = (0, 0, 0)
         self.COLOR_OVERLAY = (0, 0, 0)
+        self.CELL_COLORS = {EMPTY: self.COLOR_BARE, BLACK_DAISY: self.COLOR_BLACK,
+                            WHITE_DAISY: self.COLOR_WHITE, WATER: self.COLOR_WATER}
 
         # Map and display dimensions (also from config)
-        self.map_width = int(config.get("map_width", 500))
-        self.map_height = int(config.get("map_height", 500))
-        self.ambient_temperature = float(config.get("ambient_temperature", self.INITIAL_TEMPERATURE))
+        self.map_width = self.model.map_width
+        self.map_height = self.model.map_height
 
         # Derived dimensions for grid and window
-        self.GRID_WIDTH = self.map_width // self.cell_size
-        self.GRID_HEIGHT = self.map_height // self.cell_size
+        self.GRID_WIDTH = self.model.GRID_WIDTH
+        self.GRID_HEIGHT = self.model.GRID_HEIGHT
         self.WINDOW_WIDTH = int(self.map_width * 1.25)
         self.WINDOW_HEIGHT = self.map_height
 
+        # Offscreen isometric terrain, built once and then repainted only where
+        # cells change. Tiles are drawn around terrain_origin inside it.
+        self.terrain = None
+        self.terrain_origin = (self.GRID_HEIGHT * (self.cell_size // 2), self.cell_size // 4)
+        self.dirty_cells = []
+        # Vectorized temperature layer (geometry is rasterised on first use)
+        self.temp_overlay = None
+
         # You might also initialize other instance variables here later,
         # for example, to hold the simulation grid, temperature grid, or history data.
         btn_w = int(self.WINDOW_WIDTH * 0.10)
         btn_h = int(self.WINDOW_HEIGHT * 0.08)
         btn_x = int(self.WINDOW_WIDTH * 0.02)
         btn_y = int(self.WINDOW_HEIGHT * 0.02)
-        self.white_history = []
-        self.black_history = []
-        self.t_mean_history = []
+        # Graph histories and the CUM_MOR_NET net-change windows (O(1) ring buffers)
+        self.white_history = RingBuffer(self.MAX_HISTORY, dtype=np.int64)
+        self.black_history = RingBuffer(self.MAX_HISTORY, dtype=np.int64)
+        self.t_mean_history = RingBuffer(self.MAX_HISTORY)
         self.prev_white_count = None
         self.prev_black_count = None
-        self.white_cumulative = []
-        self.black_cumulative = []
-        self.mortal_cumulative = []
+        self.white_cumulative = RingBuffer(self.CUM_MOR_NET, dtype=np.int64)
+        self.black_cumulative = RingBuffer(self.CUM_MOR_NET, dtype=np.int64)
+        self.mortal_cumulative = RingBuffer(self.CUM_MOR_NET, dtype=np.int64)
+        # Periodic checkpoints (off unless a path is configured)
+        self.checkpoint_path = config.get("checkpoint_path")
+        self.checkpoint_every = int(config.get("checkpoint_every", 1000))
         self.pause_btn_rect = pygame.Rect(btn_x, btn_y, btn_w, btn_h)
         # first, define all six slider rect placeholders
         self.slider_rects = {
@@ -108,7 +117,6 @@ class DaisyworldSimulation:
         self.OVERLAY_SHIFT_X = float(config.get("overlay_shift_x", 200))
         self.OVERLAY_SHIFT_Y = float(config.get("overlay_shift_y", -10))
         self.gap_between_layers = float(config.get("overlay_shift_z", 50))
-        self.peak_growth   = float(config.get("peak_growth", 100.0))
         self.slider_rects = {
             "time":    {"minus":None, "plus":None},
             "sun":     {"minus":None, "plus":None},
@@ -133,25 +141,90 @@ class DaisyworldSimulation:
         )
         # snap to exact log‐value
         self.time_flow = self._time_flow_steps[self._time_flow_index]
-        
-    def draw_stat_panel(self, screen, panel_rect, grid, temp_grid, mid_temp, scroll_offset=0):
+
+    # --- Live parameters. Once the worker runs it owns the model, so God's Brush
+    # edits reach the physics through its command queue ---
+    def _set_live(self, name, value):
+        self._live[name] = value
+        if self.worker is not None:
+            self.worker.set(name, value)
+        else:
+            setattr(self.model, name, value)
+
+    @property
+    def time_flow(self):
+        return self._live["time_flow"]
+
+    @time_flow.setter
+    def time_flow(self, value):
+        self._set_live("time_flow", value)
+
+    @property
+    def sun_screening(self):
+        return self._live["sun_screening"]
+
+    @sun_screening.setter
+    def sun_screening(self, value):
+        self._set_live("sun_screening", value)
+
+    @property
+    def peak_growth(self):
+        return self._live["peak_growth"]
+
+    @peak_growth.setter
+    def peak_growth(self, value):
+        self._set_live("peak_growth", value)
+
+    def get_state(self, model_state=None):
+        """
+        Model state (default: the model's current one) plus the stats-panel
+        windows and histories.
+        """
+        state = self.model.get_state() if model_state is None else model_state
+        for key in ("white_history", "black_history", "t_mean_history",
+                    "white_cumulative", "black_cumulative", "mortal_cumulative"):
+            state[key] = getattr(self, key).values()
+        state["prev_white_count"] = self.prev_white_count
+        state["prev_black_count"] = self.prev_black_count
+        return state
+
+    def set_state(self, state):
+        self.model.set_state(state)
+        self.terrain = None
+        # headless checkpoints carry no stats-panel windows: those start empty
+        for key in ("white_history", "black_history", "t_mean_history",
+                    "white_cumulative", "black_cumulative", "mortal_cumulative"):
+            old = getattr(self, key)
+            buffer = RingBuffer(old.capacity, dtype=old.values().dtype)
+            if state.get(key) is not None:
+                buffer.extend(np.asarray(state[key]).tolist())
+            setattr(self, key, buffer)
+        self.prev_white_count = state.get("prev_white_count")
+        self.prev_black_count = state.get("prev_black_count")
+        for name in self._live:
+            self._live[name] = getattr(self.model, name)
+        self._time_flow_index = min(
+            range(len(self._time_flow_steps)),
+            key=lambda i: abs(self._time_flow_steps[i] - self.time_flow)
+        )
+
+    def save_checkpoint(self, model_state=None):
+        if self.checkpoint_path:
+            save_checkpoint(self.checkpoint_path, self.get_state(model_state))
+
+    def draw_stat_panel(self, screen, panel_rect, counts, temp_grid, mid_temp, scroll_offset=0):
         """
         Draws a stats panel in the given panel_rect, including a pie chart of cell types,
         T_mid/T_mean, net changes for daisies, and line graphs.
+        counts is the model's per-cell-type population (indexed by cell code).
         """
         PAPER_BG = (245, 245, 220)
         pygame.draw.rect(screen, PAPER_BG, panel_rect)
     
-        # --- Count cell types (ignore WATER cells) ---
-        bare_count = white_count = black_count = 0
-        for row in grid:
-            for cell in row:
-                if cell == self.EMPTY:
-                    bare_count += 1
-                elif cell == self.WHITE_DAISY:
-                    white_count += 1
-                elif cell == self.BLACK_DAISY:
-                    black_count += 1
+        # --- Cell type counts (ignore WATER cells) ---
+        bare_count = int(counts[self.EMPTY])
+        white_count = int(counts[self.WHITE_DAISY])
+        black_count = int(counts[self.BLACK_DAISY])
         
         total_count = bare_count + white_count + black_count
         if getattr(self, "paused", False):
@@ -200,65 +273,31 @@ class DaisyworldSimulation:
         black_net = black_count - self.prev_black_count
         mortal_net = (self.prev_white_count + self.prev_black_count) - (white_count + black_count)
     
-        self.white_cumulative.append(white_net)
-        self.black_cumulative.append(black_net)
-        self.mortal_cumulative.append(mortal_net)
-    
-        # Keep only last CUM_MOR_NET items
-        if len(self.white_cumulative) > self.CUM_MOR_NET:
-            self.white_cumulative.pop(0)
-        if len(self.black_cumulative) > self.CUM_MOR_NET:
-            self.black_cumulative.pop(0)
-        if len(self.mortal_cumulative) > self.CUM_MOR_NET:
-            self.mortal_cumulative.pop(0)
+        # Windows keep only the last CUM_MOR_NET items
+        self.white_cumulative.push(white_net)
+        self.black_cumulative.push(black_net)
+        self.mortal_cumulative.push(mortal_net)
     
-        # Sums
-        white_cum_net = sum(self.white_cumulative)
-        black_cum_net = sum(self.black_cumulative)
-        mortal_cum_net = sum(self.mortal_cumulative)
+        # Running sums
+        white_cum_net = self.white_cumulative.sum
+        black_cum_net = self.black_cumulative.sum
+        mortal_cum_net = self.mortal_cumulative.sum
     
         self.prev_white_count = white_count
         self.prev_black_count = black_count
     
         # --- Append current net values and compute T_mean ---
-        total_temp = 0
-        cell_count = 0
-        for row in temp_grid:
-            for t in row:
-                total_temp += t
-                cell_count += 1
-        t_mean = total_temp / cell_count if cell_count else 0
-
-        # --- Only update histories when running ---
+        t_mean = float(np.mean(temp_grid)) if np.size(temp_grid) else 0
+
+        # --- Only update histories when running (capped at MAX_HISTORY) ---
         if not self.paused:
-            self.white_history.append(white_cum_net)
-            self.black_history.append(black_cum_net)
-            self.t_mean_history.append(t_mean)
-            # trim to max length
-            if len(self.white_history) > self.MAX_HISTORY:
-                self.white_history.pop(0)
-            if len(self.black_history) > self.MAX_HISTORY:
-                self.black_history.pop(0)
-            if len(self.t_mean_history) > self.MAX_HISTORY:
-                self.t_mean_history.pop(0)
-    
-        # Gather all temps
-        all_temps = [temp for row in temp_grid for temp in row]
-        all_temps.sort()
-        if len(all_temps) >= 100:
-            Tl = sum(all_temps[:100]) / 100.0
-            Th = sum(all_temps[-100:]) / 100.0
-        else:
-            Tl = min(all_temps)
-            Th = max(all_temps)
+            self.white_history.push(white_cum_net)
+            self.black_history.push(black_cum_net)
+            self.t_mean_history.push(t_mean)
     
-        # Limit history arrays to self.MAX_HISTORY
-        if len(self.white_history) > self.MAX_HISTORY:
-            self.white_history.pop(0)
-        if len(self.black_history) > self.MAX_HISTORY:
-            self.black_history.pop(0)
-        if len(self.t_mean_history) > self.MAX_HISTORY:
-            self.t_mean_history.pop(0)
+        # Means of the k coldest / hottest cells (partial selection, no full sort)
+        k = self.model.EXTREME_K
+        Tl, Th = extreme_means(temp_grid, k)
     
         # --- Draw text stats ---
         text_y = panel_rect.y + pie_size + 10 + scroll_offset
@@ -272,10 +311,10 @@ class DaisyworldSimulation:
         mortal_text = font.render(f"Mortality Net: {mortal_cum_net}", True, self.COLOR_TEXT)
         screen.blit(mortal_text, (panel_rect.x + 10, text_y))
         text_y += 30
-        Tl_text = font.render(f"Tl (100 coldest mean): {Tl:.2f}", True, self.COLOR_TEXT)
+        Tl_text = font.render(f"Tl ({k} coldest mean): {Tl:.2f}", True, self.COLOR_TEXT)
         screen.blit(Tl_text, (panel_rect.x + 10, text_y))
         text_y += 25
-        Th_text = font.render(f"Th (100 hottest mean): {Th:.2f}", True, self.COLOR_TEXT)
+        Th_text = font.render(f"Th ({k} hottest mean): {Th:.2f}", True, self.COLOR_TEXT)
         screen.blit(Th_text, (panel_rect.x + 10, text_y))
         text_y += 25
     
@@ -287,11 +326,12 @@ class DaisyworldSimulation:
         graph_rect = pygame.Rect(panel_rect.x + 10, text_y, graph_width, graph_height)
         pygame.draw.rect(screen, (200, 200, 200), graph_rect, 1)
         if len(self.white_history) > 1:
-            max_val = max(self.white_history + [0])
-            min_val = min(self.white_history + [0])
+            history = self.white_history.values()
+            max_val = max(history.max(), 0)
+            min_val = min(history.min(), 0)
             rng_val = max_val - min_val if max_val != min_val else 1
             points = []
-            for i, val in enumerate(self.white_history):
+            for i, val in enumerate(history.tolist()):
                 x = graph_rect.x + i * graph_rect.width / self.MAX_HISTORY
                 y = graph_rect.y + graph_rect.height - ((val - min_val) / rng_val) * graph_rect.height
                 points.append((x, y))
@@ -309,11 +349,12 @@ class DaisyworldSimulation:
         graph_rect = pygame.Rect(panel_rect.x + 10, text_y, graph_width, graph_height)
         pygame.draw.rect(screen, (200, 200, 200), graph_rect, 1)
         if len(self.black_history) > 1:
-            max_val = max(self.black_history + [0])
-            min_val = min(self.black_history + [0])
+            history = self.black_history.values()
+            max_val = max(history.max(), 0)
+            min_val = min(history.min(), 0)
             rng_val = max_val - min_val if max_val != min_val else 1
             points = []
-            for i, val in enumerate(self.black_history):
+            for i, val in enumerate(history.tolist()):
                 x = graph_rect.x + i * graph_rect.width / self.MAX_HISTORY
                 y = graph_rect.y + graph_rect.height - ((val - min_val) / rng_val) * graph_rect.height
                 points.append((x, y))
@@ -331,11 +372,12 @@ class DaisyworldSimulation:
         graph_rect = pygame.Rect(panel_rect.x + 10, text_y, graph_width, graph_height)
         pygame.draw.rect(screen, (200, 200, 200), graph_rect, 1)
         if len(self.t_mean_history) > 1:
-            max_val = max(self.t_mean_history + [mid_temp])
-            min_val = min(self.t_mean_history + [mid_temp])
+            history = self.t_mean_history.values()
+            max_val = max(history.max(), mid_temp)
+            min_val = min(history.min(), mid_temp)
             rng_val = max_val - min_val if max_val != min_val else 1
             points = []
-            for i, val in enumerate(self.t_mean_history):
+            for i, val in enumerate(history.tolist()):
                 x = graph_rect.x + i * graph_rect.width / self.MAX_HISTORY
                 y = graph_rect.y + graph_rect.height - ((val - min_val) / rng_val) * graph_rect.height
                 points.append((x, y))
@@ -348,23 +390,6 @@ class DaisyworldSimulation:
                 pygame.draw.line(screen, (255,0,0), (graph_rect.x, t_mid_y),
                                  (graph_rect.x + graph_rect.width, t_mid_y), 1)
         # text_y += graph_height + 10
-    def init_grid(self):
-        if self.config.get("scenario_map") is not None:
-            return self.config["scenario_map"]
-
-        grid = [[self.EMPTY for _ in range(self.GRID_WIDTH)]
-                for _ in range(self.GRID_HEIGHT)]
-        half = 50
-        for _ in range(half):
-            x = random.randint(0, self.GRID_WIDTH - 1)
-            y = random.randint(0, self.GRID_HEIGHT - 1)
-            grid[y][x] = self.BLACK_DAISY
-        for _ in range(half):
-            x = random.randint(0, self.GRID_WIDTH - 1)
-            y = random.randint(0, self.GRID_HEIGHT - 1)
-            grid[y][x] = self.WHITE_DAISY
-        return grid
-
     def grid_to_iso(self, x, y, origin_x, origin_y):
         screen_x = origin_x + (x - y) * (self.cell_size // 2)
         screen_y = origin_y + (x + y) * (self.cell_size // 4)
@@ -379,181 +404,58 @@ class DaisyworldSimulation:
         pygame.draw.polygon(surface, color, [top, right, bottom, left])
 
     def draw_grid_iso(self, surface, grid, origin_x, origin_y):
+        """Blits the cached terrain, repainting only the cells marked dirty since last frame."""
+        if self.terrain is None:
+            self.build_terrain(grid)
+        elif self.dirty_cells:
+            self.repaint_cells(grid, np.unique(np.concatenate(self.dirty_cells)))
+        self.dirty_cells = []
+        surface.blit(self.terrain, (origin_x - self.terrain_origin[0],
+                                    origin_y - self.terrain_origin[1]))
+
+    def build_terrain(self, grid):
+        """Paints every tile into a fresh terrain surface (once per run, or after a reload)."""
+        half, quarter = self.cell_size // 2, self.cell_size // 4
+        size = ((self.GRID_WIDTH + self.GRID_HEIGHT) * half + 1,
+                (self.GRID_WIDTH + self.GRID_HEIGHT) * quarter + 1)
+        self.terrain = pygame.Surface(size).convert()
+        self.terrain.fill((0, 0, 0))
+        rows = np.asarray(grid).tolist()
         for y in range(self.GRID_HEIGHT):
             for x in range(self.GRID_WIDTH):
-                cell = grid[y][x]
-                if cell == self.EMPTY:
-                    color = self.COLOR_BARE
-                elif cell == self.BLACK_DAISY:
-                    color = self.COLOR_BLACK
-                elif cell == self.WHITE_DAISY:
-                    color = self.COLOR_WHITE
-                elif cell == self.WATER:
-                    color = self.COLOR_WATER
-                self.draw_iso_tile(surface, color, x, y, origin_x, origin_y)
-
-    def update_grid(self, grid, temp_grid, dt):
-        new = [row[:] for row in grid]
-        for y in range(self.GRID_HEIGHT):
-            for x in range(self.GRID_WIDTH):
-                cell = grid[y][x]
-                if cell == self.WATER:
-                    new[y][x] = self.WATER
-                    continue
-                if cell in (self.BLACK_DAISY, self.WHITE_DAISY):
-                    if random.random() < self.DEATH_CHANCE * self.time_flow / 100:
-                        new[y][x] = self.EMPTY
-                elif cell == self.EMPTY:
-                    neighbors, temp_sum = [], 0
-                    for dy in range(-self.INFLUENCE_LEVEL, self.INFLUENCE_LEVEL + 1):
-                        for dx in range(-self.INFLUENCE_LEVEL, self.INFLUENCE_LEVEL + 1):
-                            if dx == 0 and dy == 0:
-                                continue
-                            # level 1 = 4‑way, level 2 = 8‑way, >2 = circular
-                            if self.INFLUENCE_LEVEL == 1 and abs(dx) + abs(dy) != 1:
-                                continue
-                            if self.INFLUENCE_LEVEL > 2 and (dx*dx + dy*dy) ** 0.5 > self.INFLUENCE_LEVEL:
-                                continue
-                    
-                            nx = (x + dx) % self.GRID_WIDTH
-                            ny = y + dy
-                            if 0 <= ny < self.GRID_HEIGHT:
-                                ncell = grid[ny][nx]
-                                if ncell in (self.BLACK_DAISY, self.WHITE_DAISY):
-                                    neighbors.append(ncell)
-                                    temp_sum += temp_grid[ny][nx]
-                    if neighbors:
-                        local_temp = temp_sum/len(neighbors)
-                        # choose low‐ or high‐side tolerance
-                        tol = (self.T_TOL_LOW
-                               if local_temp < self.T_OPTIMAL
-                               else self.T_TOL_HIGH)
-                        rate = max(0, 1 - ((local_temp - self.T_OPTIMAL) / tol)**2)
-                        if random.random() < self.SPREAD_CHANCE * (self.peak_growth/100.0) * rate * self.time_flow / 100.0:
-                            new[y][x] = random.choice(neighbors)
-        return new
-    def update_temperature(self, temp_grid, grid, dt, mid_temp):
-        new_temp = [row[:] for row in temp_grid]
-        heating = [[0]*self.GRID_WIDTH for _ in range(self.GRID_HEIGHT)]
+                self.draw_iso_tile(self.terrain, self.CELL_COLORS[rows[y][x]], x, y,
+                                   *self.terrain_origin)
 
-        for y in range(self.GRID_HEIGHT):
-            for x in range(self.GRID_WIDTH):
-                if grid[y][x] == self.WATER:
-                    heating[y][x] = mid_temp
-                    continue
-
-                cell = grid[y][x]
-                if cell == self.BLACK_DAISY:
-                    albedo = self.ALBEDO_BLACK
-                elif cell == self.WHITE_DAISY:
-                    albedo = self.ALBEDO_WHITE
-                else:
-                    albedo = self.ALBEDO_BARE
-
-                day_start = self.day_phase_offset
-                day_end = (day_start + self.GRID_WIDTH/2) % self.GRID_WIDTH
-
-                if day_start < day_end:
-                    is_day = day_start <= x < day_end
-                else:
-                    is_day = x >= day_start or x < day_end
-
-                if is_day:
-                    offset = x - day_start if x >= day_start else x + (self.GRID_WIDTH - day_start)
-                    norm = offset/(self.GRID_WIDTH/2)
-                    if norm < 0.25:
-                        intensity = norm
-                    elif norm > 0.75:
-                        intensity = 1 - norm
-                    else:
-                        intensity = 1
-                else:
-                    intensity = 0
+    def repaint_cells(self, grid, cells):
+        """
+        Brings the terrain up to date after the given flat cells changed: tile
+        by tile (repaint_tiles) for up to REPAINT_LIMIT of the map, otherwise
+        by rebuilding it, which is cheaper past that point (see the
+        repaint_tiles / build_terrain benchmark cases).
+        """
+        if len(cells) > self.REPAINT_LIMIT * grid.size:
+            self.build_terrain(grid)
+        else:
+            self.repaint_tiles(grid, cells)
 
-                heating[y][x] = temp_grid[y][x] + self.HEATING_RATE * (
-                    self.sun_screening * intensity * (1 - albedo) - temp_grid[y][x]
-                )
+    def repaint_tiles(self, grid, cells):
+        """
+        Repaints the tiles at the given flat cell indices. Neighbouring diamonds
+        share edge pixels, so each repaint is clipped to the tile's bounding box
+        and redraws the 3x3 block around it in the full build's order; the
+        result is pixel-identical to rebuilding the whole surface.
+        """
+        half, quarter = self.cell_size // 2, self.cell_size // 4
+        ys, xs = np.divmod(cells, self.GRID_WIDTH)
+        for y, x in zip(ys.tolist(), xs.tolist()):
+            cx, cy = self.grid_to_iso(x, y, *self.terrain_origin)
+            self.terrain.set_clip(pygame.Rect(cx - half, cy - quarter, 2 * half + 1, 2 * quarter + 1))
+            for ny in range(max(y - 1, 0), min(y + 2, self.GRID_HEIGHT)):
+                for nx in range(max(x - 1, 0), min(x + 2, self.GRID_WIDTH)):
+                    self.draw_iso_tile(self.terrain, self.CELL_COLORS[int(grid[ny, nx])], nx, ny,
+                                       *self.terrain_origin)
+        self.terrain.set_clip(None)
 
-        for y in range(self.GRID_HEIGHT):
-            for x in range(self.GRID_WIDTH):
-                if grid[y][x] == self.WATER:
-                    new_temp[y][x] = mid_temp
-                    continue
-
-                total, count = 0, 0
-                for dy in range(-self.INFLUENCE_LEVEL, self.INFLUENCE_LEVEL + 1):
-                    for dx in range(-self.INFLUENCE_LEVEL, self.INFLUENCE_LEVEL + 1):
-                        if self.INFLUENCE_LEVEL == 1 and abs(dx) + abs(dy) != 1:
-                            continue
-                        if self.INFLUENCE_LEVEL > 2 and (dx*dx + dy*dy)**0.5 > self.INFLUENCE_LEVEL:
-                            continue
-                
-                        nx = (x + dx) % self.GRID_WIDTH
-                        ny = y + dy
-                        if 0 <= ny < self.GRID_HEIGHT:
-                            total += heating[ny][nx]
-                            count += 1
-
-                avg_heated = total/count if count else heating[y][x]
-                loss = self.COOLING_COEFFICIENT * (temp_grid[y][x]**4 - self.T_space**4)
-                new_temp[y][x] = temp_grid[y][x] + dt * (
-                    self.HEATING_RATE * (avg_heated - loss)
-                )
-
-        return new_temp
-    def compute_equilibrium_temp(self, dt=0.1):
-        temp = [[self.ambient_temperature] * self.GRID_WIDTH
-                for _ in range(self.GRID_HEIGHT)]
-        day_phase = 0.0
-
-        for _ in range(self.MAX_ITERS_TMID):
-            new = [[0.0] * self.GRID_WIDTH for _ in range(self.GRID_HEIGHT)]
-            heating = [[0.0] * self.GRID_WIDTH for _ in range(self.GRID_HEIGHT)]
-
-            # First pass: day‑night heating
-            for y in range(self.GRID_HEIGHT):
-                for x in range(self.GRID_WIDTH):
-                    albedo = self.ALBEDO_BARE
-                    day_start = day_phase
-                    day_end = (day_phase + self.GRID_WIDTH/2) % self.GRID_WIDTH
-
-                    if (day_start < day_end and day_start <= x < day_end) or \
-                       (day_start >= day_end and (x >= day_start or x < day_end)):
-                        offset = x - day_start if x >= day_start else x + (self.GRID_WIDTH - day_start)
-                        norm = offset/(self.GRID_WIDTH/2)
-                        intensity = norm if norm < 0.25 else (1 - norm if norm > 0.75 else 1)
-                    else:
-                        intensity = 0
-
-                    heating[y][x] = temp[y][x] + self.HEATING_RATE * (
-                        self.sun_screening * intensity * (1 - albedo) - temp[y][x]
-                    )
-
-            # Second pass: diffusion + radiative cooling
-            for y in range(self.GRID_HEIGHT):
-                for x in range(self.GRID_WIDTH):
-                    total, count = 0, 0
-                    for dy in (-1,0,1):
-                        for dx in (-1,0,1):
-                            ny, nx = y+dy, x+dx
-                            if 0 <= ny < self.GRID_HEIGHT and 0 <= nx < self.GRID_WIDTH:
-                                total += heating[ny][nx]
-                                count += 1
-                    avg_heated = total/count if count else heating[y][x]
-                    loss = self.COOLING_COEFFICIENT * (temp[y][x]**4 - self.T_space**4)
-                    new[y][x] = temp[y][x] + dt * (self.HEATING_RATE * (avg_heated - loss))
-
-            day_phase = (day_phase - self.DAY_BORDER_SPEED * dt) % self.GRID_WIDTH
-
-            max_diff = max(abs(new[r][c] - temp[r][c])
-                           for r in range(self.GRID_HEIGHT)
-                           for c in range(self.GRID_WIDTH))
-            temp = new
-            if max_diff < self.THRESHOLD_TMID:
-                break
-
-        # Return average equilibrium temperature
-        return sum(sum(row) for row in temp) / (self.GRID_WIDTH * self.GRID_HEIGHT)
     def draw_pause_button(self, surface, font):
         pygame.draw.rect(surface, self.COLOR_PAUSE, self.pause_btn_rect)
         pygame.draw.rect(surface, self.COLOR_BORDER, self.pause_btn_rect, 2)
@@ -701,56 +603,67 @@ class DaisyworldSimulation:
 
         return back_rect
 
+    def toggle_profiler(self, hud=None, trace=None):
+        """Shows/hides the profiler HUD and starts/stops the CSV trace; timing runs while either is on."""
+        if hud is not None:
+            self.show_profiler = hud
+        if trace is not None and trace != self.profiler.tracing:
+            if trace:
+                self.profiler.start_trace(self.profile_path)
+            else:
+                self.profiler.stop_trace()
+        enabled = self.show_profiler or self.profiler.tracing
+        if enabled != self.profiler.enabled:
+            self.profiler.enable(enabled)
+            # the model times its own phases on the worker thread
+            profiler = self.profiler if enabled else None
+            if self.worker is not None:
+                self.worker.set("profiler", profiler)
+            else:
+                self.model.profiler = profiler
+
+    def draw_profiler_hud(self, surface, font):
+        lines = self.profiler.hud_lines()
+        line_h = font.get_linesize()
+        x, y = self.pause_btn_rect.left, self.pause_btn_rect.bottom + 10
+        width = max(font.size(line)[0] for line in lines) + 12
+        box = pygame.Surface((width, line_h * len(lines) + 8), pygame.SRCALPHA)
+        box.fill((0, 0, 0, 160))
+        surface.blit(box, (x, y))
+        for i, line in enumerate(lines):
+            surface.blit(font.render(line, True, (255, 255, 255)), (x + 6, y + 4 + i * line_h))
+
     def quit_game(self):
+        # don't lose the run to a stray click on Quit
+        if self.worker is not None:
+            self.worker.stop()
+        self.profiler.stop_trace()
+        self.save_checkpoint()
         pygame.quit()
         os._exit(0)
-    def _temp_color(self, t, mean, tmin, tmax):
-        if t <= mean:
-            delta = max(mean - tmin, self.THRESHOLD)
-            v = ((t - tmin) / delta)**0.3
-            return (int(255*v), int(255*v), 255, 128)
-        else:
-            delta = max(tmax - mean, self.THRESHOLD)
-            v = (t - mean) / delta
-            return (255, int(255*(1-v)), int(255*(1-v)), 128)
-    def render(self, screen, grid, temp_grid, origin_x, origin_y, scroll_offset, mid_temp):
+    def render(self, screen, frame, origin_x, origin_y, scroll_offset):
+        """Draws one published worker Frame."""
+        profiler = self.profiler
         screen.fill((0, 0, 0))
+        temp_grid = frame.temp_grid
 
         # Draw world
-        # Draw world
-        self.draw_grid_iso(screen, grid, origin_x, origin_y)
+        self.draw_grid_iso(screen, frame.grid, origin_x, origin_y)
+        profiler.lap("terrain")
 
         # → now draw overlay *behind* the stats panel...
         if not self.paused:
             # Temperature overlay
-            temps = [temp for row in temp_grid for temp in row]
-            current_min, current_max = min(temps), max(temps)
-            t_mean = sum(temps) / len(temps)
-
-            overlay = pygame.Surface((self.WINDOW_WIDTH, self.WINDOW_HEIGHT), pygame.SRCALPHA)
-            for y in range(self.GRID_HEIGHT):
-                for x in range(self.GRID_WIDTH):
-                    t = temp_grid[y][x]
-                    cx, cy = self.grid_to_iso(x, y, origin_x, origin_y)
-                    cy -= (int(self.tile_height / math.tan(math.radians(30))) * 3
-                           + self.gap_between_layers)
-                    cx += self.OVERLAY_SHIFT_X
-                    cy += self.OVERLAY_SHIFT_Y
-                    h = int(self.tile_height * self.temp_thickness)
-                    color = self._temp_color(t, t_mean, current_min, current_max)
-                    points = [
-                        (cx, cy - h//2),
-                        (cx + self.tile_width//2, cy),
-                        (cx, cy + h//2),
-                        (cx - self.tile_width//2, cy),
-                    ]
-                    pygame.draw.polygon(overlay, color, points)
-
-            screen.blit(overlay, (0, 0))
+            if self.temp_overlay is None:
+                self.temp_overlay = TemperatureOverlay(self.GRID_WIDTH, self.GRID_HEIGHT,
+                                                       self.cell_size, self.temp_thickness)
+            self.temp_overlay.draw(screen, temp_grid, origin_x, origin_y,
+                                   self.OVERLAY_SHIFT_X, self.OVERLAY_SHIFT_Y,
+                                   self.gap_between_layers, self.THRESHOLD)
 
             # Draw dawn/dusk borders
-            dawn = self.day_phase_offset
-            dusk = (self.day_phase_offset + self.GRID_WIDTH/2) % self.GRID_WIDTH
+            dawn = frame.day_phase_offset
+            dusk = (frame.day_phase_offset + self.GRID_WIDTH/2) % self.GRID_WIDTH
             dawn_pts = [
                 self.grid_to_iso(dawn, row, origin_x, origin_y)
                 for row in range(self.GRID_HEIGHT)
@@ -761,12 +674,15 @@ class DaisyworldSimulation:
             ]
             pygame.draw.lines(screen, (255,165,0), False, dawn_pts, 2)
             pygame.draw.lines(screen, (0,255,255), False, dusk_pts, 2)
+        profiler.lap("overlay")
 
         # Draw stats panel *after* the overlay so it’s always on top
         stats_w = int(self.WINDOW_WIDTH * 0.20)
         stats_x = self.WINDOW_WIDTH - stats_w
         stats_rect = pygame.Rect(stats_x, 0, stats_w, self.WINDOW_HEIGHT)
-        self.draw_stat_panel(screen, stats_rect, grid, temp_grid, mid_temp, scroll_offset)
+        self.draw_stat_panel(screen, stats_rect, frame.cell_counts, temp_grid, frame.mid_temp,
+                             scroll_offset)
+        profiler.lap("stats")
 
         # Draw pause UI
         if self.paused:
@@ -776,8 +692,12 @@ class DaisyworldSimulation:
                 self.draw_pause_menu(screen, self.font)
         else:
             self.draw_pause_button(screen, self.font)
+        if self.show_profiler:
+            self.draw_profiler_hud(screen, self.font)
+        profiler.lap("ui")
 
         pygame.display.flip()
+        profiler.lap("flip")
     def run(self):
         pygame.init()
         screen = pygame.display.set_mode((self.WINDOW_WIDTH, self.WINDOW_HEIGHT))
@@ -785,19 +705,15 @@ class DaisyworldSimulation:
         clock = pygame.time.Clock()
         self.font = pygame.font.SysFont(None, 24)
 
-        grid = self.init_grid()
-        mid_temp = self.compute_equilibrium_temp()
-        temp_grid = [
-                    [mid_temp if grid[y][x] == self.WATER else self.ambient_temperature
-                     for x in range(self.GRID_WIDTH)]
-                    for y in range(self.GRID_HEIGHT)
-                ]
-        
+        if self.model.grid is None:
+            self.model.reset()
+        self.worker = SimulationWorker(self.model, self.MAX_SUBSTEPS, self.MAX_FRAME_TIME,
+                                       checkpoint_every=self.checkpoint_every if self.checkpoint_path else None)
+        self.worker.start()
 
         self.paused = False
         origin_x, origin_y = self.WINDOW_WIDTH // 2, 50
         scroll_offset = 0
-        self.day_phase_offset = 0.0
         last_mouse = None
         self.dragging_panel = False
         self.dragging_world = False
@@ -834,18 +750,21 @@ class DaisyworldSimulation:
                 if direction and now - self.hold_last_time >= self.hold_repeat_interval:
                     do_step(key, direction)
                     self.hold_last_time = now
-            # keep the loop at a steady 60 FPS, then speed up/slower by time_flow (%)
+            # draw at most 60 FPS; the worker keeps simulated time in step with wall time
             FPS_CAP = 60
-            raw_dt = clock.tick(FPS_CAP) / 1000.0       # real seconds per frame at 60 FPS
-            dt = raw_dt * (self.time_flow / 100.0)      # scale by your brush setting (e.g. 100→1×speed)
-            if not self.paused:
-                self.day_phase_offset = (self.day_phase_offset - self.DAY_BORDER_SPEED * dt) % self.GRID_WIDTH
+            self.profiler.begin_frame()
+            clock.tick(FPS_CAP)
+            self.profiler.lap("wait")
 
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
                     self.quit_game()
                 elif event.type == pygame.KEYDOWN and event.key == pygame.K_SPACE:
                     self.paused = not self.paused
+                elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                    self.toggle_profiler(hud=not self.show_profiler)
+                elif event.type == pygame.KEYDOWN and event.key == pygame.K_F4:
+                    self.toggle_profiler(trace=not self.profiler.tracing)
                 elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
                     if not self.paused and self.pause_btn_rect.collidepoint(event.pos):
                         self.paused = True
@@ -917,8 +836,15 @@ class DaisyworldSimulation:
                         origin_y += dy
                         last_mouse = event.pos
 
-            if not self.paused:
-                temp_grid = self.update_temperature(temp_grid, grid, dt, mid_temp)
-                grid = self.update_grid(grid, temp_grid, dt)
+            self.profiler.lap("events")
+
+            # the worker steps on its own clock; just draw its newest state
+            self.worker.pause(self.paused)
+            frame, changed = self.worker.latest()
+            self.dirty_cells.extend(changed)
+            for state in self.worker.checkpoint_states():
+                self.save_checkpoint(state)
+            self.profiler.lap("sync")
 
-            self.render(screen, grid, temp_grid, origin_x, origin_y, scroll_offset, mid_temp)
\ No newline at end of file
+            self.render(screen, frame, origin_x, origin_y, scroll_offset)
+            self.profiler.end_frame()
\ No newline at end of file
@@ -0,0 +1,151 @@
+import queue
+import struct
+import threading
+import numpy as np
+
+# ----- File layout -----
+# [header: HEADER_SIZE bytes]
+# [steps:  capacity x int64           ] step number of each frame
+# [cells:  capacity x H x W  uint8    ] grid frames
+# [temps:  capacity x H x W  float32  ] temperature frames
+# Regions start on ALIGN-byte boundaries so every frame can be mapped directly.
+MAGIC = b"DWSNAP01"
+VERSION = 1
+HEADER_FORMAT = "<8sIIIIQQ"  # magic, version, height, width, every, capacity, count
+HEADER_SIZE = 64
+ALIGN = 64
+_COUNT_OFFSET = struct.calcsize("<8sIIIIQ")
+
+def _align(n):
+    return (n + ALIGN - 1) // ALIGN * ALIGN
+
+def _layout(height, width, capacity):
+    """Byte offsets of the steps/cells/temps regions and the total file size."""
+    frame = height * width
+    steps_off = HEADER_SIZE
+    cells_off = _align(steps_off + 8 * capacity)
+    temps_off = _align(cells_off + frame * capacity)
+    total = temps_off + 4 * frame * capacity
+    return steps_off, cells_off, temps_off, total
+
+class SnapshotWriter:
+    """
+    Appends (grid, temp_grid) frames to a preallocated memory-mapped file.
+
+    write() only takes a compact copy of the fields (uint8 cells, float32
+    temperatures) and queues it; a background thread copies queued frames
+    into the mapping, so disk I/O never runs on the stepping loop. It only
+    blocks if the writer falls `queue_size` frames behind.
+    """
+    def __init__(self, path, height, width, capacity, every=1, queue_size=8):
+        if capacity < 1:
+            raise ValueError("snapshot capacity must be at least one frame")
+        if every < 1:
+            raise ValueError("snapshot interval must be at least one step")
+        self.path = path
+        self.height = height
+        self.width = width
+        self.capacity = capacity
+        self.every = every
+        steps_off, cells_off, temps_off, total = _layout(height, width, capacity)
+        with open(path, "wb") as f:
+            f.write(struct.pack(HEADER_FORMAT, MAGIC, VERSION, height, width, every, capacity, 0))
+            f.truncate(total)
+
+        self._header = np.memmap(path, dtype=np.uint8, mode="r+", shape=(HEADER_SIZE,))
+        self._steps = np.memmap(path, dtype=np.int64, mode="r+", offset=steps_off,
+                                shape=(capacity,))
+        self._cells = np.memmap(path, dtype=np.uint8, mode="r+", offset=cells_off,
+                                shape=(capacity, height, width))
+        self._temps = np.memmap(path, dtype=np.float32, mode="r+", offset=temps_off,
+                                shape=(capacity, height, width))
+        self._queued = 0
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._error = None
+        self._thread = threading.Thread(target=self._drain, daemon=True)
+        self._thread.start()
+
+    def write(self, step, grid, temp_grid):
+        """Queues one frame; raises once the preallocated capacity is used up."""
+        if self._error is not None:
+            raise self._error
+        if self._queued >= self.capacity:
+            raise ValueError(f"snapshot file {self.path} is full ({self.capacity} frames)")
+        cells = np.array(grid, dtype=np.uint8)
+        temps = np.array(temp_grid, dtype=np.float32)
+        self._queue.put((self._queued, step, cells, temps))
+        self._queued += 1
+
+    def maybe_write(self, step, grid, temp_grid):
+        """Writes the frame if `step` falls on the snapshot interval."""
+        if step % self.every == 0:
+            self.write(step, grid, temp_grid)
+
+    def _drain(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            if self._error is not None:
+                continue
+            index, step, cells, temps = item
+            try:
+                self._cells[index] = cells
+                self._temps[index] = temps
+                self._steps[index] = step
+                # publish the frame only after its data is in place
+                self._header[_COUNT_OFFSET:_COUNT_OFFSET + 8] = np.frombuffer(
+                    struct.pack("<Q", index + 1), dtype=np.uint8)
+            except Exception as exc:
+                self._error = exc
+
+    def close(self):
+        """Waits for queued frames, flushes the mapping and releases the file."""
+        self._queue.put(None)
+        self._thread.join()
+        for region in (self._steps, self._cells, self._temps, self._header):
+            region.flush()
+        self._steps = self._cells = self._temps = self._header = None
+        if self._error is not None:
+            raise self._error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class SnapshotReader:
+    """
+    Read-only view of a snapshot file. `cells`, `temps` and `steps` are
+    memory-mapped arrays of the frames written so far: slicing them reads only
+    the pages touched, never the whole file.
+    """
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            header = f.read(struct.calcsize(HEADER_FORMAT))
+        magic, version, height, width, every, capacity, count = struct.unpack(HEADER_FORMAT, header)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a Daisyworld snapshot file")
+        if version != VERSION:
+            raise ValueError(f"{path}: unsupported snapshot version {version}")
+        self.height, self.width = height, width
+        self.every, self.capacity, self.count = every, capacity, count
+        steps_off, cells_off, temps_off, _ = _layout(height, width, capacity)
+        self.steps = np.memmap(path, dtype=np.int64, mode="r", offset=steps_off,
+                               shape=(capacity,))[:count]
+        self.cells = np.memmap(path, dtype=np.uint8, mode="r", offset=cells_off,
+                               shape=(capacity, height, width))[:count]
+        self.temps = np.memmap(path, dtype=np.float32, mode="r", offset=temps_off,
+                               shape=(capacity, height, width))[:count]
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        """(step, cells, temps) of frame i, as views into the mapping."""
+        return self.steps[i], self.cells[i], self.temps[i]
+
+def open_snapshots(path):
+    return SnapshotReader(path)
@@ -0,0 +1,54 @@
+import numpy as np
+
+def extreme_means(temps, k=100):
+    """
+    Returns (Tl, Th): the means of the k coldest and the k hottest values.
+    Uses one O(n) partition that places both cut points, instead of sorting
+    the whole field. With fewer than k values, falls back to (min, max).
+    """
+    flat = np.ravel(temps)
+    n = flat.size
+    if n < k or k < 1:
+        return float(flat.min()), float(flat.max())
+    part = np.partition(flat, (k - 1, n - k))
+    return float(part[:k].mean()), float(part[n - k:].mean())
+
+class RingBuffer:
+    """
+    Fixed-capacity window over a preallocated array that keeps a running sum.
+    push() overwrites the oldest value once the window is full, so push, sum
+    and len are O(1) whatever the capacity. values() returns the window
+    oldest-first (O(capacity), meant for drawing).
+    """
+    def __init__(self, capacity, dtype=float):
+        self.capacity = max(int(capacity), 0)
+        self._data = np.zeros(self.capacity, dtype=dtype)
+        self._start = 0
+        self._len = 0
+        self.sum = self._data.dtype.type(0)
+
+    def push(self, value):
+        if self.capacity == 0:
+            return
+        value = self._data.dtype.type(value)
+        if self._len < self.capacity:
+            self._data[(self._start + self._len) % self.capacity] = value
+            self._len += 1
+        else:
+            self.sum -= self._data[self._start]
+            self._data[self._start] = value
+            self._start = (self._start + 1) % self.capacity
+        self.sum += value
+
+    def extend(self, values):
+        for value in values:
+            self.push(value)
+
+    def values(self):
+        end = self._start + self._len
+        if end <= self.capacity:
+            return self._data[self._start:end].copy()
+        return np.concatenate((self._data[self._start:], self._data[:end - self.capacity]))
+
+    def __len__(self):
+        return self._len
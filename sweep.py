@@ -0,0 +1,72 @@
+import csv
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from constants import DEFAULT_CONFIG
+from model import DaisyworldModel
+
+# Columns every sweep row carries after its override keys
+SUMMARY_FIELDS = ["T_mid", "T_mean", "white_fraction", "black_fraction", "bare_fraction", "Tl", "Th"]
+
+def cartesian_grid(axes):
+    """
+    Expands {"SUN_SCREENING": [1500, 1900], "T_OPTIMAL": [450, 500]} into one
+    override dict per combination (4 here).
+    """
+    keys = list(axes)
+    return [dict(zip(keys, values)) for values in itertools.product(*(axes[k] for k in keys))]
+
+def load_sweep(path):
+    """
+    Reads a sweep spec: either a JSON list of override dicts, or a JSON object
+    mapping parameter names to lists of values (expanded as a cartesian grid).
+    """
+    with open(path) as f:
+        spec = json.load(f)
+    if isinstance(spec, list):
+        return spec
+    return cartesian_grid(spec)
+
+def run_config(config, steps, dt=None):
+    """Runs one configuration headless for `steps` steps and returns its summary."""
+    model = DaisyworldModel(config)
+    model.reset()
+    if dt is None:
+        dt = model.frame_dt()
+    for _ in range(steps):
+        model.step(dt)
+    return model.summary()
+
+def _run_override(base_config, override, steps, dt):
+    config = dict(base_config)
+    config.update(override)
+    row = dict(override)
+    row.update(run_config(config, steps, dt))
+    return row
+
+def run_sweep(overrides, base_config=None, steps=1000, dt=None, max_workers=None):
+    """
+    Runs every override on top of base_config (default: DEFAULT_CONFIG) in a
+    process pool sized to the machine's cores. Returns one row per override,
+    in input order: the override keys followed by SUMMARY_FIELDS.
+    """
+    base = dict(DEFAULT_CONFIG if base_config is None else base_config)
+    workers = max_workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=min(workers, max(len(overrides), 1))) as pool:
+        futures = [pool.submit(_run_override, base, override, steps, dt)
+                   for override in overrides]
+        return [future.result() for future in futures]
+
+def write_results(rows, path):
+    """Writes sweep rows to a CSV table (override columns first, then metrics)."""
+    columns = []
+    for row in rows:
+        for key in row:
+            if key not in columns and key not in SUMMARY_FIELDS:
+                columns.append(key)
+    columns += SUMMARY_FIELDS
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=columns)
+        writer.writeheader()
+        writer.writerows(rows)
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# the modules live flat in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# render paths run without a display
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
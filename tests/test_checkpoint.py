@@ -0,0 +1,38 @@
+import pytest
+from constants import DEFAULT_CONFIG
+from checkpoint import load_checkpoint
+from main import headless_loop
+
+def small_config(**overrides):
+    config = dict(DEFAULT_CONFIG, map_width=200, map_height=100, seed=1)
+    config.update(overrides)
+    return config
+
+def test_simulator_resumes_headless_checkpoint(tmp_path):
+    pytest.importorskip("pygame")
+    from simulator import DaisyworldSimulation
+    path = str(tmp_path / "run.ckpt")
+    model = headless_loop(small_config(checkpoint_path=path), 20)
+    state = load_checkpoint(path)
+    assert "white_history" not in state
+
+    sim = DaisyworldSimulation(state["config"])
+    sim.set_state(state)
+    assert sim.model.step_count == model.step_count == 20
+    assert (sim.model.grid == model.grid).all()
+    assert len(sim.white_history) == 0 and len(sim.mortal_cumulative) == 0
+    assert sim.prev_white_count is None and sim.prev_black_count is None
+
+def test_simulator_checkpoint_round_trip(tmp_path):
+    pytest.importorskip("pygame")
+    from simulator import DaisyworldSimulation
+    sim = DaisyworldSimulation(small_config())
+    sim.model.reset()
+    sim.white_history.extend([3, 4, 5])
+    sim.prev_white_count = 5
+    state = sim.get_state()
+
+    resumed = DaisyworldSimulation(small_config())
+    resumed.set_state(state)
+    assert resumed.white_history.values().tolist() == [3, 4, 5]
+    assert resumed.prev_white_count == 5
@@ -0,0 +1,15 @@
+import pytest
+from ensemble import run_ensemble
+
+def small_config():
+    return dict(map_width=200, map_height=100)
+
+@pytest.mark.parametrize("members, record_every", [(0, 1), (-2, 1), (2, 0), (2, -3)])
+def test_ensemble_rejects_bad_counts(members, record_every):
+    with pytest.raises(ValueError):
+        run_ensemble(small_config(), members, 5, seed=1, record_every=record_every)
+
+def test_ensemble_samples_every_record_interval():
+    result = run_ensemble(small_config(), 2, 7, seed=1, record_every=3, max_workers=1)
+    assert list(result["steps"]) == [0, 3, 6]
+    assert result["members"]["T_mean"].shape == (2, 3)
@@ -0,0 +1,41 @@
+import os
+import time
+import eqcache
+from constants import DEFAULT_CONFIG
+from eqcache import EquilibriumCache, equilibrium_inputs, equilibrium_key
+from model import DaisyworldModel
+
+def small_config(**overrides):
+    config = dict(DEFAULT_CONFIG, map_width=200, map_height=100, seed=1)
+    config.update(overrides)
+    return config
+
+def test_default_run_writes_no_cache(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    DaisyworldModel(small_config()).reset()
+    assert os.listdir(tmp_path) == []
+
+def test_lookup_solves_once(tmp_path):
+    path = str(tmp_path / "eq.sqlite")
+    model = DaisyworldModel(small_config(equilibrium_cache=path))
+    model.reset()
+    with EquilibriumCache(path) as cache:
+        assert len(cache) == 1
+        assert cache.lookup(model) == model.mid_temp
+
+def test_hits_only_refresh_stale_marks(tmp_path, monkeypatch):
+    model = DaisyworldModel(small_config())
+    key = equilibrium_key(equilibrium_inputs(model))
+    with EquilibriumCache(str(tmp_path / "eq.sqlite")) as cache:
+        cache.put(key, 300.0)
+
+        def last_used():
+            return cache._db.execute("SELECT last_used FROM equilibrium").fetchone()[0]
+        marked = last_used()
+        assert cache.get(key) == 300.0
+        assert last_used() == marked
+
+        later = marked + eqcache.TOUCH_INTERVAL + 1
+        monkeypatch.setattr(time, "time", lambda: later)
+        assert cache.get(key) == 300.0
+        assert last_used() == later
@@ -0,0 +1,19 @@
+import numpy as np
+from constants import CELL_SIZE
+from insolation import Insolation, insolation_profile
+from model import DaisyworldModel
+
+def test_default_insolation_is_exact():
+    insolation = Insolation(90)
+    for day_phase in (0.0, 3.3, 41.77, 89.9):
+        assert np.array_equal(insolation.row(day_phase), insolation_profile(90, day_phase))
+
+def test_table_matches_profile_on_its_grid():
+    insolation = Insolation(90, resolution=16)
+    for day_phase in (0.0, 3.25, 41.5625, 89.9375):
+        assert np.allclose(insolation.row(day_phase), insolation_profile(90, day_phase))
+
+def test_equilibrium_uses_exact_forcing_by_default():
+    config = dict(map_width=90 * CELL_SIZE, map_height=30 * CELL_SIZE, DAY_BORDER_SPEED=7)
+    exact = DaisyworldModel(dict(config, INSOLATION_RESOLUTION=0)).compute_equilibrium_temp()
+    assert DaisyworldModel(config).compute_equilibrium_temp() == exact
@@ -0,0 +1,23 @@
+import numpy as np
+import pytest
+from model import DaisyworldModel
+from parallel import ParallelModel
+
+def static_config(**overrides):
+    # no deaths or spread: the strips' own RNG streams never come into play
+    config = dict(map_width=200, map_height=120, seed=1, DEATH_CHANCE=0, SPREAD_CHANCE=0)
+    config.update(overrides)
+    return config
+
+@pytest.mark.parametrize("integrator, dt", [("explicit", 0.05), ("imex", 0.5), ("imex", 5.0)])
+def test_parallel_temperatures_match_serial(integrator, dt):
+    config = static_config(INTEGRATOR=integrator, INFLUENCE_LEVEL=2)
+    serial = DaisyworldModel(dict(config))
+    serial.reset()
+    with ParallelModel(dict(config), workers=3) as parallel:
+        parallel.set_state(serial.get_state())
+        for _ in range(5):
+            serial.step(dt)
+            parallel.step(dt)
+        assert np.abs(parallel.temp_grid - serial.temp_grid).max() < 1e-9
+        assert (parallel.grid == serial.grid).all()
@@ -0,0 +1,26 @@
+import numpy as np
+import pytest
+from constants import DEFAULT_CONFIG
+
+pygame = pytest.importorskip("pygame")
+
+def terrain_pixels(sim):
+    return pygame.surfarray.array3d(sim.terrain)
+
+@pytest.mark.parametrize("fraction", [0.01, 0.3])
+def test_repaint_matches_full_rebuild(fraction):
+    from simulator import DaisyworldSimulation
+    pygame.init()
+    sim = DaisyworldSimulation(dict(DEFAULT_CONFIG, map_width=400, map_height=200, seed=1))
+    pygame.display.set_mode((sim.WINDOW_WIDTH, sim.WINDOW_HEIGHT))
+    sim.model.reset()
+    grid = sim.model.grid.copy()
+    sim.build_terrain(grid)
+
+    rng = np.random.default_rng(0)
+    cells = np.sort(rng.choice(grid.size, int(fraction * grid.size), replace=False))
+    grid.flat[cells] = rng.integers(0, 4, len(cells))
+    sim.repaint_cells(grid, cells)
+    repainted = terrain_pixels(sim)
+    sim.build_terrain(grid)
+    assert np.array_equal(repainted, terrain_pixels(sim))
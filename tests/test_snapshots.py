@@ -0,0 +1,37 @@
+import argparse
+import pytest
+from constants import DEFAULT_CONFIG
+from main import headless_loop, positive_int
+from snapshots import open_snapshots
+
+def small_config(**overrides):
+    config = dict(DEFAULT_CONFIG, map_width=200, map_height=100, seed=1)
+    config.update(overrides)
+    return config
+
+@pytest.mark.parametrize("steps, every, expected", [
+    (35, 10, [0, 10, 20, 30, 35]),
+    (30, 10, [0, 10, 20, 30]),
+    (3, 1, [0, 1, 2, 3]),
+    (0, 10, [0]),
+])
+def test_snapshots_include_first_and_final_state(tmp_path, steps, every, expected):
+    path = str(tmp_path / "run.snap")
+    model = headless_loop(small_config(), steps, snapshot_path=path, snapshot_every=every)
+    snapshots = open_snapshots(path)
+    assert list(snapshots.steps) == expected
+    assert (snapshots.cells[-1] == model.grid).all()
+
+def test_resumed_snapshots_follow_the_step_count(tmp_path):
+    state = headless_loop(small_config(), 9).get_state()
+    path = str(tmp_path / "run.snap")
+    headless_loop(small_config(), 12, snapshot_path=path, snapshot_every=10, state=state)
+    assert list(open_snapshots(path).steps) == [9, 10, 20, 21]
+
+def test_snapshot_interval_must_be_positive(tmp_path):
+    with pytest.raises(ValueError):
+        headless_loop(small_config(), 5, snapshot_path=str(tmp_path / "run.snap"),
+                      snapshot_every=0)
+    with pytest.raises(argparse.ArgumentTypeError):
+        positive_int("0")
+    assert positive_int("3") == 3
@@ -0,0 +1,170 @@
+import queue
+import threading
+import time
+import numpy as np
+
+class Frame:
+    """One published model state: everything the window draws."""
+    def __init__(self, height, width):
+        self.grid = np.zeros((height, width), dtype=np.uint8)
+        self.temp_grid = np.zeros((height, width))
+        self.cell_counts = np.zeros(4, dtype=np.int64)
+        self.mid_temp = 0.0
+        self.day_phase_offset = 0.0
+        self.step_count = 0
+
+    def fill(self, model):
+        np.copyto(self.grid, model.grid)
+        np.copyto(self.temp_grid, model.temp_grid)
+        np.copyto(self.cell_counts, model.cell_counts)
+        self.mid_temp = model.mid_temp
+        self.day_phase_offset = model.day_phase_offset
+        self.step_count = model.step_count
+
+class SimulationWorker:
+    """
+    Runs a DaisyworldModel on a background thread so the event loop never
+    waits for a step.
+
+    The worker owns the model while it runs; the window only talks to it
+    through set()/pause() (a command queue, applied between steps) and
+    latest() (double-buffered frames). Completed states are copied into the
+    back Frame and swapped to the front under a lock; latest() in turn swaps
+    the front with the Frame the window holds, so the window always reads a
+    whole step and the worker never writes into the frame being drawn. The
+    heavy NumPy kernels release the GIL, which leaves the event loop free to
+    run alongside them.
+
+    Time follows the fixed-step clock of the windowed run: wall time x
+    time_flow is drained in SIM_DT steps, at most max_substeps per batch,
+    dropping any backlog beyond that.
+    """
+    def __init__(self, model, max_substeps=32, max_frame_time=0.25, publish_interval=1 / 60,
+                 checkpoint_every=None):
+        self.model = model
+        self.max_substeps = max_substeps
+        self.max_frame_time = max_frame_time
+        self.publish_interval = publish_interval
+        self.checkpoint_every = checkpoint_every
+        self._commands = queue.Queue()
+        self._lock = threading.Lock()
+        self._front = Frame(model.GRID_HEIGHT, model.GRID_WIDTH)
+        self._back = Frame(model.GRID_HEIGHT, model.GRID_WIDTH)
+        self._reading = Frame(model.GRID_HEIGHT, model.GRID_WIDTH)
+        self._front.fill(model)
+        self._reading.fill(model)
+        self._fresh = False
+        # changed-cell indices published since the window last took a frame
+        self._changed = []
+        # model.get_state() of each checkpoint step not yet collected
+        self._states = []
+        self._paused = False
+        self._worker_paused = False
+        self._stopped = False
+        self._last = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    # --- Window side ---
+    def start(self):
+        self._thread.start()
+
+    def set(self, name, value):
+        """Queues a model attribute change (time_flow, sun_screening, peak_growth, profiler)."""
+        self._commands.put(("set", name, value))
+
+    def pause(self, paused):
+        if paused != self._paused:
+            self._paused = paused
+            self._commands.put(("pause", paused))
+
+    def latest(self):
+        """
+        Returns (frame, changed): the newest published Frame and the flat
+        indices of every cell changed since the previous call. The frame stays
+        valid until the next call.
+        """
+        with self._lock:
+            if self._fresh:
+                self._reading, self._front = self._front, self._reading
+                self._fresh = False
+            changed, self._changed = self._changed, []
+        return self._reading, changed
+
+    def checkpoint_states(self):
+        """Model states captured at checkpoint steps since the last call, oldest first."""
+        with self._lock:
+            states, self._states = self._states, []
+        return states
+
+    def stop(self):
+        """Stops after the current step and waits; the model is then safe to use again."""
+        self._commands.put(("stop",))
+        self._thread.join()
+
+    # --- Worker thread ---
+    def _apply(self, command):
+        if command[0] == "set":
+            setattr(self.model, command[1], command[2])
+        elif command[0] == "pause":
+            self._worker_paused = command[1]
+            # paused time is not owed to the clock
+            self._accumulator = 0.0
+            self._last = time.perf_counter()
+        else:
+            self._stopped = True
+
+    def _publish(self, changed, state=None):
+        self._back.fill(self.model)
+        with self._lock:
+            self._front, self._back = self._back, self._front
+            self._fresh = True
+            self._changed.extend(changed)
+            if state is not None:
+                self._states.append(state)
+
+    def _run(self):
+        model = self.model
+        sim_dt = model.SIM_DT
+        self._accumulator = 0.0
+        self._last = last_publish = time.perf_counter()
+        while not self._stopped:
+            # block while paused, otherwise just drain whatever has arrived
+            try:
+                while True:
+                    self._apply(self._commands.get(block=self._worker_paused))
+                    if self._stopped:
+                        return
+            except queue.Empty:
+                pass
+
+            now = time.perf_counter()
+            rate = model.time_flow / 100.0
+            self._accumulator += min(now - self._last, self.max_frame_time) * rate
+            self._last = now
+            substeps = min(int(self._accumulator / sim_dt), self.max_substeps)
+            if substeps == 0:
+                # sleep until the next step is due, but wake up for commands
+                wait = (sim_dt - self._accumulator) / max(rate, 1e-9)
+                try:
+                    self._apply(self._commands.get(timeout=min(wait, self.publish_interval)))
+                except queue.Empty:
+                    pass
+                continue
+
+            changed = []
+            for _ in range(substeps):
+                model.step(sim_dt)
+                changed.append(model.changed)
+                state = None
+                if self.checkpoint_every and model.step_count % self.checkpoint_every == 0:
+                    state = model.get_state()
+                if state is not None or time.perf_counter() - last_publish >= self.publish_interval:
+                    self._publish(changed, state)
+                    changed = []
+                    last_publish = time.perf_counter()
+            if changed:
+                self._publish(changed)
+                last_publish = time.perf_counter()
+            self._accumulator -= substeps * sim_dt
+            if substeps == self.max_substeps:
+                self._accumulator = min(self._accumulator, sim_dt)